@@ -0,0 +1,313 @@
+"""
+Typical-period aggregation of the scenario profiles with tsam.
+
+The 8760 hourly profiles are clustered into a small number of typical
+periods (e.g. days or weeks). The `EnergySystem` is then built on the
+concatenated typical periods only. To keep the model consistent with the
+full year
+
+* every timestep gets a weight (number of hours it represents) that is
+  used for the objective and all energy limits (`summed_max`, CO2-limit,
+  excess energy, RE-share),
+* storages are linked across periods following Kotzur et al. (2018): the
+  storage content of the model is the intra-period content relative to the
+  start of a typical period, an additional inter-period content links the
+  sequence of all original periods,
+* results are expanded back to the full year using the cluster order.
+
+`compare` reports the deviation of an aggregated run from the full
+resolution run of the same scenario.
+"""
+
+import collections
+import os
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as po
+
+import tsam.timeseriesaggregation as tsam
+
+import expressions
+
+# fossil units used for the RE-share, s. scripts/results.py
+conventionals = ["hfo-lsce", "hfo-msce"]
+
+# header rows of the sequences with (from, to, type) columns
+HEADERS = {"excess": [0, 1, 2]}
+
+Aggregation = collections.namedtuple(
+    "Aggregation",
+    [
+        "profiles",
+        "weights",
+        "cluster_order",
+        "hours_per_period",
+        "timeindex",
+    ],
+)
+Aggregation.__doc__ = """Result of `aggregate`
+
+profiles: typical periods one after another with an hourly index
+weights: hours of the full year represented by every timestep
+cluster_order: typical period of every original period
+hours_per_period: length of a period in hours
+timeindex: index of the full resolution profiles
+"""
+
+
+def aggregate(profiles, typical_periods, hours_per_period=24, peaks=None):
+    """Clusters the profiles into `typical_periods` typical periods
+
+    The periods containing the maximum of the `peaks` columns (e.g. the
+    load profiles) are added as extra periods, so the peak demand is kept.
+    """
+    agg = tsam.TimeSeriesAggregation(
+        profiles.reset_index(drop=True),
+        resolution=1,
+        noTypicalPeriods=typical_periods,
+        hoursPerPeriod=hours_per_period,
+        clusterMethod="hierarchical",
+        extremePeriodMethod="new_cluster_center" if peaks else "None",
+        addPeakMax=peaks or [],
+    )
+    typical = agg.createTypicalPeriods()
+
+    cluster_order = np.asarray(agg.clusterOrder)
+    periods = sorted(agg.clusterPeriodNoOccur.keys())
+    occurrence = np.array([agg.clusterPeriodNoOccur[k] for k in periods])
+
+    typical = typical.loc[periods, profiles.columns]
+    typical.index = pd.date_range(
+        profiles.index[0], periods=len(typical), freq="1H"
+    )
+
+    # tsam pads the last period if the year is not a multiple of the
+    # period length, scale the weights to the length of the year
+    weights = np.repeat(occurrence, hours_per_period)
+    weights = pd.Series(
+        weights * len(profiles) / weights.sum(), index=typical.index
+    )
+
+    return Aggregation(
+        profiles=typical,
+        weights=weights,
+        cluster_order=np.searchsorted(periods, cluster_order),
+        hours_per_period=hours_per_period,
+        timeindex=profiles.index,
+    )
+
+
+def weight_summed_max(m, weights):
+    """Replaces the `summed_max` constraints of solph by weighted ones"""
+    m.weighted_summed_max = po.ConstraintList()
+
+    for name in ["Flow", "InvestmentFlow"]:
+        block = getattr(m, name, None)
+        if block is None or not hasattr(block, "summed_max"):
+            continue
+        for i, o in block.summed_max:
+            block.summed_max[i, o].deactivate()
+            flow = m.flows[i, o]
+            if name == "Flow":
+                capacity = flow.nominal_value
+            else:
+                capacity = block.invest[i, o] + flow.investment.existing
+            m.weighted_summed_max.add(
+                expressions.flow_sum(m, [(i, o)], weights)
+                <= flow.summed_max * capacity
+            )
+
+    return m
+
+
+def _storages(m):
+    """Returns tuples of (block, storage, capacity expression)"""
+    storages = []
+    block = getattr(m, "GenericStorageBlock", None)
+    if block is not None:
+        for n in block.STORAGES:
+            storages.append((block, n, n.nominal_storage_capacity))
+    block = getattr(m, "GenericInvestmentStorageBlock", None)
+    if block is not None:
+        for n in block.INVESTSTORAGES:
+            storages.append(
+                (block, n, block.invest[n] + n.investment.existing)
+            )
+    return storages
+
+
+def link_storages(m, aggregation):
+    """Adds the inter-period storage linking
+
+    The solph storage content is turned into the intra-period content, i.e.
+    it starts from zero in every typical period and may become negative.
+    The content of the original period d is
+
+        soc[d] + storage_content[k(d), t]
+
+    with k(d) the typical period of d. Its bounds are applied to the
+    extreme values of the intra-period content of every typical period.
+    """
+    L = aggregation.hours_per_period
+    order = aggregation.cluster_order
+    K = len(m.TIMESTEPS) // L
+    D = len(order)
+
+    storages = _storages(m)
+    if not storages:
+        return m
+
+    m.StorageLinking = b = po.Block()
+    b.STORAGES = po.Set(initialize=[n for _, n, _ in storages], ordered=True)
+    b.PERIODS = po.RangeSet(0, K - 1)
+    # start of every original period plus the end of the last one
+    b.SOC_PERIODS = po.RangeSet(0, D)
+
+    b.soc = po.Var(b.STORAGES, b.SOC_PERIODS, within=po.NonNegativeReals)
+    b.intra_max = po.Var(b.STORAGES, b.PERIODS)
+    b.intra_min = po.Var(b.STORAGES, b.PERIODS)
+
+    b.intra_start = po.ConstraintList()
+    b.intra_bounds = po.ConstraintList()
+    b.soc_balance = po.ConstraintList()
+    b.soc_bounds = po.ConstraintList()
+    b.soc_cyclic = po.ConstraintList()
+
+    for block, n, capacity in storages:
+        content = block.storage_content
+        i = list(n.inputs)[0]
+        o = list(n.outputs)[0]
+        loss = n.loss_rate[0]
+
+        # intra-period content is unbounded, its limits are applied below
+        for t in m.TIMESTEPS:
+            content[n, t].domain = po.Reals
+            content[n, t].setlb(None)
+            content[n, t].setub(None)
+            for name in ["max_storage_content", "min_storage_content"]:
+                if (n, t) in getattr(block, name, {}):
+                    getattr(block, name)[n, t].deactivate()
+        for name in [
+            "balance_first",
+            "balanced_cstr",
+            "init_content_limit",
+            "init_content_fix",
+        ]:
+            if n in getattr(block, name, {}):
+                getattr(block, name)[n].deactivate()
+
+        for k in range(K):
+            start = k * L
+            if start > 0:
+                block.balance[n, start].deactivate()
+            b.intra_start.add(
+                content[n, start]
+                == m.flow[i, n, start] * n.inflow_conversion_factor[start]
+                - m.flow[n, o, start] / n.outflow_conversion_factor[start]
+            )
+            for t in range(start, start + L):
+                b.intra_bounds.add(b.intra_max[n, k] >= content[n, t])
+                b.intra_bounds.add(b.intra_min[n, k] <= content[n, t])
+
+        for d, k in enumerate(order):
+            b.soc_balance.add(
+                b.soc[n, d + 1]
+                == b.soc[n, d] * (1 - loss) ** L + content[n, k * L + L - 1]
+            )
+            b.soc_bounds.add(b.soc[n, d] + b.intra_max[n, k] <= capacity)
+            b.soc_bounds.add(
+                b.soc[n, d] + b.intra_min[n, k]
+                >= capacity * n.min_storage_level[0]
+            )
+        b.soc_cyclic.add(b.soc[n, 0] == b.soc[n, D])
+
+    return m
+
+
+def expand(df, aggregation):
+    """Expands a frame on the typical periods to the full year"""
+    L = aggregation.hours_per_period
+    values = df.values.reshape(-1, L, df.shape[1])[aggregation.cluster_order]
+    values = values.reshape(-1, df.shape[1])[: len(aggregation.timeindex)]
+    return pd.DataFrame(
+        values, index=aggregation.timeindex, columns=df.columns
+    )
+
+
+def filling_levels(m, aggregation):
+    """Returns the storage contents of the full year"""
+    L = aggregation.hours_per_period
+    order = aggregation.cluster_order
+    steps = np.arange(1, L + 1)
+
+    levels = {}
+    for block, n, _ in _storages(m):
+        intra = np.array(
+            [block.storage_content[n, t].value for t in m.TIMESTEPS]
+        ).reshape(-1, L)
+        soc = np.array(
+            [m.StorageLinking.soc[n, d].value for d in range(len(order))]
+        )
+        decay = (1 - n.loss_rate[0]) ** steps
+        levels[n.label] = (
+            soc[:, None] * decay[None, :] + intra[order]
+        ).ravel()[: len(aggregation.timeindex)]
+
+    return pd.DataFrame(levels, index=aggregation.timeindex)
+
+
+def expand_results(m, scenario_path, aggregation):
+    """Rewrites the sequences written by `writer.write` for the year"""
+    n = len(aggregation.profiles)
+    for name in os.listdir(scenario_path):
+        if not name.endswith(".csv") or name == "filling_levels.csv":
+            continue
+        path = os.path.join(scenario_path, name)
+        df = pd.read_csv(
+            path, index_col=0, header=HEADERS.get(name[: -len(".csv")], 0)
+        )
+        if len(df) == n:
+            expand(df, aggregation).to_csv(path)
+
+    if hasattr(m, "StorageLinking"):
+        filling_levels(m, aggregation).to_csv(
+            os.path.join(scenario_path, "filling_levels.csv")
+        )
+
+
+def _kpis(scenario_path):
+    capacities = pd.read_csv(
+        os.path.join(scenario_path, "capacities.csv"), index_col=0
+    )
+    capacities = capacities.groupby(level=0)["value"].sum()
+
+    energy = pd.read_csv(
+        os.path.join(scenario_path, "BB-electricity.csv"), index_col=0
+    ).sum()
+    load = energy[[c for c in energy.index if "load" in c]].sum()
+
+    objective = pd.read_csv(
+        os.path.join(scenario_path, "costs.csv"), index_col=0
+    ).iloc[:, 0]["Objective value"]
+
+    kpis = capacities.rename(lambda c: "capacity " + c)
+    kpis["LCOE"] = objective / load / 1000
+    kpis["RE share"] = 1 - energy.reindex(conventionals).sum() / load
+
+    return kpis
+
+
+def compare(full_path, aggregated_path):
+    """Deviation of capacities, LCOE and RE-share of an aggregated run"""
+    full = _kpis(full_path)
+    aggregated = _kpis(aggregated_path)
+
+    df = pd.concat([full, aggregated], axis=1, sort=False).fillna(0)
+    df.columns = ["full", "aggregated"]
+    df["deviation"] = df["aggregated"] - df["full"]
+    df["deviation in %"] = (
+        df["deviation"] / df["full"].where(df["full"] != 0) * 100
+    )
+
+    return df
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of the construction of integral constraints.
+
+Compares a generator `sum`, Pyomo's `quicksum` and `expressions.flow_sum`
+for a constraint `sum_(i, o) sum_t weights[t] * flow[i, o, t] <= 1` with a
+growing number of flows and timesteps. Run from the repository root:
+
+    python scripts/benchmark-expressions.py
+"""
+
+import itertools
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as po
+from pyomo.core.util import quicksum
+
+import expressions
+
+
+def model(flows, timesteps):
+    m = po.ConcreteModel()
+    m.TIMESTEPS = po.RangeSet(0, timesteps - 1)
+    m.FLOWS = po.Set(
+        initialize=[("source-{}".format(k), "bus") for k in range(flows)],
+        dimen=2,
+        ordered=True,
+    )
+    m.flow = po.Var(m.FLOWS, m.TIMESTEPS, within=po.NonNegativeReals)
+    return m
+
+
+def generator(m, weights):
+    return sum(
+        m.flow[i, o, t] * weights[t] for i, o in m.FLOWS for t in m.TIMESTEPS
+    )
+
+
+def pyomo_quicksum(m, weights):
+    return quicksum(
+        (
+            m.flow[i, o, t] * weights[t]
+            for i, o in m.FLOWS
+            for t in m.TIMESTEPS
+        ),
+        linear=True,
+    )
+
+
+def flow_sum(m, weights):
+    return expressions.flow_sum(m, m.FLOWS, weights)
+
+
+methods = {"sum": generator, "quicksum": pyomo_quicksum, "flow_sum": flow_sum}
+
+
+def measure(method, flows, timesteps):
+    m = model(flows, timesteps)
+    weights = np.random.rand(timesteps)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    m.constraint = po.Constraint(expr=method(m, weights) <= 1)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak / 1e6
+
+
+results = []
+for flows, timesteps, name in itertools.product(
+    [1, 10, 40], [168, 720, 8760], methods
+):
+    seconds, peak = measure(methods[name], flows, timesteps)
+    results.append(
+        {
+            "flows": flows,
+            "timesteps": timesteps,
+            "method": name,
+            "seconds": seconds,
+            "peak memory in MB": peak,
+        }
+    )
+
+df = pd.DataFrame(results).set_index(["flows", "timesteps", "method"])
+print(df["seconds"].unstack().round(3))
+print(df["peak memory in MB"].unstack().round(1))
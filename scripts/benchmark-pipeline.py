@@ -0,0 +1,299 @@
+"""
+Benchmark of the stages of the model pipeline.
+
+Every case (`CASES`) is run for truncated horizons of its profiles and the
+seconds of each stage are measured:
+
+    load         reading the scenario workbook (`--cold`: parse the Excel)
+    facades      `build_energy_system`
+    model        `Model(es)`
+    constraints  `add_constraints`
+    solve        `solvers.solve`
+    results      `writer.extract`
+    write        `writer.write`
+    aggregation  KPIs of `results.py`, s. `kpi.compute`
+
+The measurements are appended to a JSON history and compared with a
+baseline, the benchmark fails if a stage is slower than the baseline by
+more than the threshold. Run from the repository root, e.g.:
+
+    python scripts/benchmark-pipeline.py --horizons 168 720
+    python scripts/benchmark-pipeline.py --save-baseline
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from oemof.solph import Model
+
+import cache
+import delta
+import kpi
+import model
+import solvers
+import writer
+from naming import SCENARIOS
+
+# name: (scenario, sensitivity)
+CASES = {
+    "SQ": ("SQ", None),
+    "REF": ("REF", None),
+    "REF-100": ("REF", 1),
+    "NPHS": ("NPHS", None),
+}
+
+HORIZONS = [168, 720, 8760]
+
+STAGES = [
+    "load",
+    "facades",
+    "model",
+    "constraints",
+    "solve",
+    "results",
+    "write",
+    "aggregation",
+]
+
+benchmark_path = os.path.join(model.results_path, "benchmarks")
+
+
+def _commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(
+    scenario,
+    sensitivity=None,
+    horizon=8760,
+    solver=None,
+    backend="file",
+    cold=False,
+    datapath=model.datapath,
+):
+    """Runs the pipeline of one case, returns the seconds per stage"""
+    carrier_scenario, tech_scenario = {s: (c, t) for s, c, t in SCENARIOS}[
+        scenario
+    ]
+    seconds = {}
+
+    def timed(stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds[stage] = time.perf_counter() - start
+        return result
+
+    if cold:
+        names = [scenario, "carrier-technology"]
+        # scenarios with a delta are read from the workbook of their base
+        if delta.exists(scenario, datapath):
+            names.append(delta.read(scenario, datapath)[0]["base"])
+        for name in names:
+            cache.clear(os.path.join(datapath, name + ".xls"))
+
+    inputs = timed("load", model.read_input, scenario, datapath)
+    inputs = dict(inputs, profiles=inputs["profiles"].iloc[:horizon])
+
+    es = timed(
+        "facades",
+        model.build_energy_system,
+        inputs,
+        carrier_scenario,
+        tech_scenario,
+    )
+    m = timed("model", Model, es)
+    timed("constraints", model.add_constraints, m, es, inputs, sensitivity)
+    timed("solve", solvers.solve, m, solver, backend)
+    solution = timed("results", writer.extract, m)
+
+    scenario_path = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        timed(
+            "write",
+            writer.write,
+            es,
+            solution,
+            scenario_path,
+            co2=sensitivity is None and inputs["co2_limit"] is not None,
+        )
+        timed("aggregation", kpi.compute, scenario_path)
+    finally:
+        shutil.rmtree(scenario_path)
+
+    return seconds
+
+
+def run(
+    cases=CASES,
+    horizons=HORIZONS,
+    solver=None,
+    backend="file",
+    cold=False,
+    datapath=model.datapath,
+):
+    """Measures all cases and horizons, returns an entry of the history"""
+    solver = solver or solvers.default_solver()
+    results = {}
+    for name in cases:
+        scenario, sensitivity = CASES[name]
+        for horizon in horizons:
+            key = "{}/{}h".format(name, horizon)
+            results[key] = measure(
+                scenario, sensitivity, horizon, solver, backend, cold, datapath
+            )
+            print(
+                "{}: {:.2f} s".format(key, sum(results[key].values())),
+                flush=True,
+            )
+
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "solver": solver,
+        "backend": backend,
+        "cold": cold,
+        "results": results,
+    }
+
+
+def table(entry):
+    """Seconds per case (rows) and stage (columns) of a history entry"""
+    return pd.DataFrame(entry["results"]).T.reindex(columns=STAGES)
+
+
+def compare(entry, baseline, threshold=0.2, minimum=0.1):
+    """Compares an entry with the baseline
+
+    Returns the relative change per case and stage and the stages that are
+    slower by more than `threshold`. Stages that took less than `minimum`
+    seconds in the baseline are not checked, they are too noisy.
+    """
+    current = table(entry)
+    base = table(baseline).reindex(index=current.index)
+
+    change = current / base - 1
+    failed = change[(change > threshold) & (base >= minimum)].stack().dropna()
+
+    return change, failed
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+def _write(path, content):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(content, f, indent=2)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache._replace(path, write)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--cases", nargs="+", choices=list(CASES), default=list(CASES)
+    )
+    parser.add_argument("--horizons", nargs="+", type=int, default=HORIZONS)
+    parser.add_argument("--solver")
+    parser.add_argument("--backend", choices=solvers.BACKENDS, default="file")
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Clear the workbook cache, i.e. measure the Excel parsing.",
+    )
+    parser.add_argument("--datapath", default=model.datapath)
+    parser.add_argument(
+        "--history",
+        default=os.path.join(benchmark_path, "history.json"),
+        help="All measurements are appended to this file.",
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(benchmark_path, "baseline.json")
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store this measurement as the new baseline.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail if a stage is slower than the baseline by more than "
+        "this share, e.g. 0.2 for 20%%.",
+    )
+    args = parser.parse_args()
+
+    entry = run(
+        args.cases,
+        args.horizons,
+        args.solver,
+        args.backend,
+        args.cold,
+        args.datapath,
+    )
+
+    history = _read(args.history) or []
+    history.append(entry)
+    _write(args.history, history)
+
+    print(table(entry).round(3))
+
+    if args.save_baseline:
+        _write(args.baseline, entry)
+        print("Saved baseline {}.".format(args.baseline))
+        return
+
+    baseline = _read(args.baseline)
+    if baseline is None:
+        print("No baseline, save one with --save-baseline.")
+        return
+
+    change, failed = compare(entry, baseline, args.threshold)
+    print(
+        "Change against the baseline of {} ({}):".format(
+            baseline["time"], baseline["commit"]
+        )
+    )
+    print((change * 100).round(1))
+
+    if not failed.empty:
+        print(
+            "Slower than the baseline by more than {:.0%}:".format(
+                args.threshold
+            )
+        )
+        print((failed * 100).round(1))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark of the solver profiles on the reference scenarios.
+
+Every case of `benchmark-pipeline.py` is built once and solved with each
+solver profile (s. `solvers.PROFILES`) that is available here. The seconds
+of the export, solve and loading of the solution are measured together
+with the objective value, which is compared with the one of a reference
+profile: barrier without crossover or loose tolerances are faster, but the
+objective must stay close. Run from the repository root, e.g.:
+
+    python scripts/benchmark-solvers.py --horizon 720 \
+        --profiles cbc cbc-barrier gurobi-dual --reference cbc
+
+Results are written to `benchmarks/solvers.csv` in the results path.
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import pyomo.environ as po
+from oemof.solph import Model
+
+import model
+import solvers
+from naming import SCENARIOS
+
+# name: (scenario, sensitivity), s. `benchmark-pipeline.py`
+CASES = {
+    "SQ": ("SQ", None),
+    "REF": ("REF", None),
+    "REF-100": ("REF", 1),
+    "NPHS": ("NPHS", None),
+}
+
+benchmark_path = os.path.join(model.results_path, "benchmarks")
+
+
+def build(scenario, sensitivity=None, horizon=None, datapath=model.datapath):
+    """Builds the model of a case, `horizon` truncates the profiles"""
+    carrier_scenario, tech_scenario = {s: (c, t) for s, c, t in SCENARIOS}[
+        scenario
+    ]
+    inputs = model.read_input(scenario, datapath)
+    if horizon is not None:
+        inputs = dict(inputs, profiles=inputs["profiles"].iloc[:horizon])
+
+    es = model.build_energy_system(inputs, carrier_scenario, tech_scenario)
+    m = Model(es)
+    model.add_constraints(m, es, inputs, sensitivity)
+    return m
+
+
+def measure(m, settings):
+    """Solves `m` with the settings of a profile
+
+    Returns the seconds per solver stage, the objective value and the
+    termination condition.
+    """
+    start = time.perf_counter()
+    try:
+        _, timings = solvers.solve(
+            m,
+            settings["solver"],
+            settings["backend"] or "file",
+            settings["threads"],
+            options=solvers.options(**dict(settings, threads=None)),
+        )
+        objective = po.value(m.objective)
+        status = "ok"
+    except Exception as e:
+        # e.g. time limit reached without solution
+        timings = {}
+        objective = None
+        status = str(e)
+
+    return dict(
+        timings,
+        total=time.perf_counter() - start,
+        objective=objective,
+        status=status,
+    )
+
+
+def run(
+    cases=CASES,
+    profiles=None,
+    reference=None,
+    horizon=None,
+    settings=None,
+    datapath=model.datapath,
+):
+    """Solves all cases with all available `profiles`
+
+    `settings` replace the ones of every profile, e.g. a time limit.
+    Returns a frame with one row per case and profile, the deviation of
+    the objective is relative to the profile `reference` (default: the
+    first one).
+    """
+    profiles = {
+        name: solvers.profile(name, **(settings or {}))
+        for name in profiles or solvers.PROFILES
+    }
+    for name, p in list(profiles.items()):
+        if not solvers.available(p["solver"], p["backend"] or "file"):
+            print("Skipped profile {}, not available.".format(name))
+            del profiles[name]
+    if not profiles:
+        raise ValueError("None of the solver profiles is available.")
+    reference = reference or list(profiles)[0]
+
+    rows = []
+    for case in cases:
+        scenario, sensitivity = CASES[case]
+        m = build(scenario, sensitivity, horizon, datapath)
+        for name, p in profiles.items():
+            result = measure(m, p)
+            print(
+                "{} {}: {:.2f} s, objective {}.".format(
+                    case, name, result["total"], result["objective"]
+                ),
+                flush=True,
+            )
+            rows.append(dict(result, case=case, profile=name))
+
+    df = pd.DataFrame(rows).set_index(["case", "profile"])
+    if reference in profiles:
+        objective = df["objective"].astype(float)
+        base = objective.xs(reference, level="profile")
+        df["deviation"] = (
+            objective / base.reindex(df.index.get_level_values("case")).values
+            - 1
+        )
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--cases", nargs="+", choices=list(CASES), default=list(CASES)
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(solvers.PROFILES),
+        help="Default: all available profiles.",
+    )
+    parser.add_argument(
+        "--reference",
+        help="Objective values are compared with this profile, default: "
+        "the first one.",
+    )
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        help="Solve only the first hours of the profiles, e.g. 720.",
+    )
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--time-limit", type=float)
+    parser.add_argument("--datapath", default=model.datapath)
+    parser.add_argument(
+        "--output", default=os.path.join(benchmark_path, "solvers.csv")
+    )
+    args = parser.parse_args()
+
+    df = run(
+        args.cases,
+        args.profiles,
+        args.reference,
+        args.horizon,
+        {"threads": args.threads, "time_limit": args.time_limit},
+        args.datapath,
+    )
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    df.to_csv(args.output)
+
+    print(df.round(4))
+    print("Results are in {}.".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Binary cache for the scenario workbooks.
+
+Parsing the `.xls` workbooks with xlrd takes seconds, mostly for the 8760
+rows of the `profiles` sheet. On first access every sheet of a workbook is
+parsed once and stored as a Feather file in a `.cache` directory next to the
+workbook (i.e. `scenarios/.cache`). Later reads load the Feather files,
+which takes milliseconds.
+
+A cache entry is valid as long as size and modification time of the workbook
+are unchanged. If only the modification time changed (e.g. after a git
+checkout) the content hash decides whether the workbook has to be parsed
+again. Entries written with other versions of pandas or pyarrow, and
+entries that cannot be loaded, are parsed again as well.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow
+
+# format of the cached sheets, entries of other formats are invalid
+FORMAT = {
+    "format": "feather",
+    "pandas": pd.__version__,
+    "pyarrow": pyarrow.__version__,
+}
+
+# workbooks already loaded by this process
+_workbooks = {}
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def _hash(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _directory(path, cachepath=None):
+    if cachepath is None:
+        cachepath = os.path.join(os.path.dirname(path), ".cache")
+    return os.path.join(cachepath, os.path.splitext(os.path.basename(path))[0])
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _replace(path, write):
+    # write to a temporary file first, so parallel runs never see a
+    # partially written file
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_manifest(directory, manifest):
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    _replace(os.path.join(directory, "manifest.json"), write)
+
+
+def _is_valid(path, directory, manifest):
+    """Checks the manifest against the workbook, refreshes its stat if the
+    content is unchanged
+    """
+    if manifest is None:
+        return False
+
+    if any(manifest.get(k) != v for k, v in FORMAT.items()):
+        return False
+
+    stat = _stat(path)
+    if stat == manifest["stat"]:
+        return True
+
+    if stat["size"] == manifest["stat"]["size"]:
+        if _hash(path) == manifest["sha1"]:
+            manifest["stat"] = stat
+            _write_manifest(directory, manifest)
+            return True
+
+    return False
+
+
+def _convert(path, directory):
+    """Parses every sheet of the workbook once and stores it as Feather"""
+    os.makedirs(directory, exist_ok=True)
+
+    file = pd.ExcelFile(path)
+    # Feather only stores a default index, empty sheets have an object index
+    sheets = {
+        name: file.parse(name).reset_index(drop=True)
+        for name in file.sheet_names
+    }
+
+    for name, sheet in sheets.items():
+        _replace(os.path.join(directory, name + ".feather"), sheet.to_feather)
+
+    # sheets of older formats
+    for name in os.listdir(directory):
+        if name.endswith(".pkl"):
+            os.remove(os.path.join(directory, name))
+
+    _write_manifest(
+        directory,
+        dict(
+            FORMAT,
+            workbook=os.path.abspath(path),
+            stat=_stat(path),
+            sha1=_hash(path),
+            sheet_names=file.sheet_names,
+        ),
+    )
+
+    return sheets
+
+
+def read_workbook(path, cachepath=None):
+    """Returns all sheets of a workbook as dictionary of raw DataFrames
+
+    The DataFrames are read without index, s. `read_sheet` to get them in
+    the shape of `pd.read_excel(..., index_col=...)`.
+    """
+    directory = _directory(path, cachepath)
+    manifest = _read_manifest(directory)
+
+    if not _is_valid(path, directory, manifest):
+        sheets = _convert(path, directory)
+        manifest = _read_manifest(directory)
+    else:
+        sheets = None
+
+    key = (os.path.abspath(path), manifest["sha1"])
+    if key not in _workbooks:
+        if sheets is None:
+            try:
+                sheets = {
+                    name: pd.read_feather(
+                        os.path.join(directory, name + ".feather")
+                    )
+                    for name in manifest["sheet_names"]
+                }
+            except Exception:
+                # e.g. a removed or truncated file
+                sheets = _convert(path, directory)
+        _workbooks[key] = sheets
+
+    return _workbooks[key]
+
+
+def sheet_names(path, cachepath=None):
+    return list(read_workbook(path, cachepath).keys())
+
+
+def read_sheet(
+    path, sheet_name, index_col=0, parse_dates=False, cachepath=None
+):
+    """Cached replacement for `pd.read_excel(path, sheet_name, ...)`"""
+    sheet = read_workbook(path, cachepath)[sheet_name].copy()
+
+    if index_col is not None:
+        if isinstance(index_col, int):
+            index_col = [index_col]
+        sheet = sheet.set_index([sheet.columns[i] for i in index_col])
+
+    if parse_dates:
+        sheet.index = pd.to_datetime(sheet.index)
+
+    return sheet
+
+
+def clear(path, cachepath=None):
+    """Removes the cached sheets of a workbook"""
+    directory = _directory(path, cachepath)
+    for key in [k for k in _workbooks if k[0] == os.path.abspath(path)]:
+        del _workbooks[key]
+    if os.path.exists(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
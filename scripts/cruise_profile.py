@@ -0,0 +1,111 @@
+"""
+Vectorized generator of the cruise ship demand profile.
+
+Every stay of a ship is split into hourly steps starting at its arrival.
+The demand of a step is interpolated from the generic demand curve of a
+stay (`DEMAND` over the relative time of the stay `TIMEREL`). All steps of
+all stays are computed in one numpy pass and summed into the hours of the
+year with `np.bincount`.
+
+    python scripts/cruise_profile.py
+
+writes `data/cruise_ship_profile.csv` from `data/cruise-arrivals.xlsx`.
+Schedules of several years or Monte-Carlo samples can be passed at once
+with a `sample` number per stay, s. `profile`.
+"""
+
+import numpy as np
+import pandas as pd
+
+# generic demand of a ship in MW over the relative time of its stay
+DEMAND = np.array([12, 12, 10, 6, 4, 4, 4, 4, 6, 10, 12, 12])
+TIMEREL = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]) / 11
+
+HOUR = np.timedelta64(1, "h").astype("timedelta64[ns]").astype(np.int64)
+
+
+def read_arrivals(path="data/cruise-arrivals.xlsx", year=2018):
+    """Reads the arrivals of `year` with the columns ARRIVAL and DEPATURE"""
+    df = pd.read_excel(
+        path,
+        dtype={"YEAR": int, "ARRIVED DATE": str, "TIME": str, "HOURS": str},
+    )
+    df = df[df["Year"] == year]
+
+    df["ARRIVAL"] = pd.to_datetime(df["ARRIVED DATE"] + " " + df["TIME"])
+    df["DEPATURE"] = df["ARRIVAL"] + pd.to_timedelta(df["HOURS"], "h")
+
+    return df
+
+
+def _nanoseconds(times):
+    times = pd.to_datetime(np.asarray(times)).values
+    return times.astype("datetime64[ns]").astype(np.int64)
+
+
+def steps(arrival, departure):
+    """Returns the time and demand of the hourly steps of all stays
+
+    A stay has a step every hour from arrival to departure (both included),
+    the relative time of step i of n steps is i / n. Times are returned as
+    datetime64[ns] integers, the number of steps per stay is returned too.
+    """
+    arrival = _nanoseconds(arrival)
+    departure = _nanoseconds(departure)
+
+    n = (departure - arrival) // HOUR + 1
+    stay = np.repeat(np.arange(len(n)), n)
+    step = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+
+    time = arrival[stay] + step * HOUR
+    demand = np.interp((step + 1) / n[stay], TIMEREL, DEMAND)
+
+    return time, demand, n
+
+
+def profile(
+    arrival,
+    departure,
+    start="2018",
+    periods=8760,
+    sample=None,
+    normalize=True,
+):
+    """Hourly demand of all stays, normalized to a sum of 1
+
+    With `sample` (one integer per stay) the stays are grouped into
+    independent schedules, e.g. years or Monte-Carlo samples, and a frame
+    with one column per sample is returned.
+    """
+    time, demand, n = steps(arrival, departure)
+
+    start = pd.Timestamp(start)
+    hour = (time - start.value) // HOUR
+    valid = (hour >= 0) & (hour < periods)
+
+    if sample is None:
+        samples = 1
+        index = hour[valid]
+    else:
+        sample = np.asarray(sample)
+        samples = sample.max() + 1
+        index = np.repeat(sample, n)[valid] * periods + hour[valid]
+
+    values = np.bincount(
+        index, weights=demand[valid], minlength=samples * periods
+    ).reshape(samples, periods)
+
+    if normalize:
+        values = values / values.sum(axis=1, keepdims=True)
+
+    timeindex = pd.date_range(start, periods=periods, freq="H")
+    if sample is None:
+        return pd.Series(values[0], index=timeindex, name="demand")
+    return pd.DataFrame(values.T, index=timeindex)
+
+
+if __name__ == "__main__":
+    df = read_arrivals()
+    profile(df["ARRIVAL"], df["DEPATURE"]).to_csv(
+        "data/cruise_ship_profile.csv"
+    )
@@ -0,0 +1,332 @@
+"""
+Scenarios defined as a base scenario and their differences to it.
+
+The scenario workbooks are copies of each other that differ in a few cells.
+A delta `scenarios/delta/<scenario>.json` holds only these differences:
+
+    {
+        "base": "REF",
+        "changed": {"load": {"el-load": {"amount": 1321270.2}}},
+        "removed": {"load": ["cruise-load-1"]},
+        "added": {"load": {"cruise-load": {"bus": "BB-electricity", ...}}},
+        "columns": {},
+        "index": {"load": [...]},
+        "co2_limit": {"BB-electricity": {"value": 1000000}},
+        "profiles": {"columns": [...], "changed": ["BB-ev-load-profile"]},
+        "workbooks": {"HD.xls": "6f1c...", "REF.xls": "0b9e..."}
+    }
+
+`columns` and `index` are the columns and the order of the rows of sheets
+where they differ from the base (removed and added rows aside), `profiles`
+all columns of the profiles and the ones whose values are in
+`<scenario>-profiles.csv.gz` next to the delta (one row per timestep of the
+base). Profiles that differ from the base only by rounding (s. `TOLERANCE`)
+are taken from the base. `workbooks` are the SHA-1 hashes of the workbooks
+of the scenario and its base the delta was written from.
+
+`model.read_input` applies the delta of a scenario to the inputs of its base
+if the delta exists. If one of its workbooks changed since, the delta is
+outdated and reading it fails, s. `check`. Without the workbook of the
+scenario the delta is its only definition. The deltas are written from the
+workbooks with:
+
+    python scripts/delta.py --base REF
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# entries of a delta per sheet
+SHEET_KEYS = ["changed", "removed", "added", "columns", "index"]
+
+# relative deviation of profile values that is considered rounding
+TOLERANCE = 1e-9
+
+
+def path(scenario, datapath):
+    return os.path.join(datapath, "delta", scenario + ".json")
+
+
+def exists(scenario, datapath):
+    return os.path.exists(path(scenario, datapath))
+
+
+def _profiles_path(scenario, datapath):
+    return os.path.splitext(path(scenario, datapath))[0] + "-profiles.csv.gz"
+
+
+def _sha1(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def workbooks(scenarios, datapath):
+    """SHA-1 hashes of the existing workbooks of `scenarios`"""
+    hashes = {}
+    for scenario in scenarios:
+        workbook = os.path.join(datapath, scenario + ".xls")
+        if os.path.exists(workbook):
+            hashes[os.path.basename(workbook)] = _sha1(workbook)
+    return hashes
+
+
+def check(scenario, delta, datapath):
+    """Raises a ValueError if a workbook changed since `delta` was written
+
+    Workbooks that do not exist (anymore) are not checked.
+    """
+    current = workbooks([scenario, delta["base"]], datapath)
+    changed = [
+        name
+        for name, sha1 in current.items()
+        if delta["workbooks"].get(name) != sha1
+    ]
+    if changed:
+        raise ValueError(
+            "The delta of {} is outdated, {} changed. Write the deltas again "
+            "with `python scripts/delta.py`.".format(
+                scenario, ", ".join(changed)
+            )
+        )
+
+
+def _value(v):
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+def _rows(df):
+    return {
+        name: {k: _value(v) for k, v in row.items()}
+        for name, row in df.to_dict(orient="index").items()
+    }
+
+
+def _frame(rows, columns, index_name):
+    rows = {
+        name: {k: np.nan if v is None else v for k, v in row.items()}
+        for name, row in rows.items()
+    }
+    df = pd.DataFrame.from_dict(rows, orient="index", columns=columns)
+    df.index.name = index_name
+    return df
+
+
+def diff(base, inputs):
+    """Differences of the `inputs` of a scenario to the `base` inputs
+
+    Both are read with `model.read_input`. Returns the delta without its
+    profile values and the changed profiles as a DataFrame.
+    """
+    delta = dict(
+        {key: {} for key in SHEET_KEYS}, co2_limit=None, profiles=None
+    )
+
+    for typ, df in inputs["data"].items():
+        other = base["data"].get(typ, df.iloc[:0])
+        if list(df.columns) != list(other.columns):
+            delta["columns"][typ] = list(df.columns)
+
+        rows, base_rows = _rows(df), _rows(other)
+        removed = [name for name in base_rows if name not in rows]
+        added = {n: r for n, r in rows.items() if n not in base_rows}
+        changed = {}
+        for name, row in rows.items():
+            if name not in base_rows:
+                continue
+            cells = {
+                k: v
+                for k, v in row.items()
+                if k not in base_rows[name] or v != base_rows[name][k]
+            }
+            if cells:
+                changed[name] = cells
+
+        order = [n for n in base_rows if n in rows] + list(added)
+        if order != list(rows):
+            delta["index"][typ] = list(rows)
+
+        for key, value in [
+            ("removed", removed),
+            ("added", added),
+            ("changed", changed),
+        ]:
+            if value:
+                delta[key][typ] = value
+
+    for typ in base["data"]:
+        if typ not in inputs["data"]:
+            raise ValueError("Sheet {} of the base is missing.".format(typ))
+
+    co2_limit = inputs["co2_limit"]
+    if co2_limit is not None:
+        if base["co2_limit"] is None or not co2_limit.equals(
+            base["co2_limit"]
+        ):
+            delta["co2_limit"] = _rows(co2_limit)
+    elif base["co2_limit"] is not None:
+        raise ValueError("The co2-limit of the base cannot be removed.")
+
+    profiles, base_profiles = inputs["profiles"], base["profiles"]
+    if not profiles.index.equals(base_profiles.index):
+        raise ValueError("The timeindex differs from the one of the base.")
+    changed = [
+        c
+        for c in profiles.columns
+        if c not in base_profiles.columns
+        or not np.allclose(
+            profiles[c].values,
+            base_profiles[c].values,
+            rtol=TOLERANCE,
+            atol=0,
+        )
+    ]
+    if changed or list(profiles.columns) != list(base_profiles.columns):
+        delta["profiles"] = {
+            "columns": list(profiles.columns),
+            "changed": changed,
+        }
+
+    return delta, profiles[changed]
+
+
+def write(scenario, base_scenario, delta, profiles, datapath):
+    """Writes the `delta` and the changed `profiles` of `scenario`
+
+    The hashes of the workbooks of the scenario and the base are stored
+    with the delta, s. `check`.
+    """
+    os.makedirs(os.path.join(datapath, "delta"), exist_ok=True)
+    delta = dict(
+        base=base_scenario,
+        workbooks=workbooks([scenario, base_scenario], datapath),
+        **delta
+    )
+    with open(path(scenario, datapath), "w") as f:
+        json.dump(delta, f, indent=4)
+        f.write("\n")
+
+    csv = _profiles_path(scenario, datapath)
+    if len(profiles.columns):
+        # without the time of writing, the file only changes with its data
+        profiles.to_csv(
+            csv, index=False, compression={"method": "gzip", "mtime": 0}
+        )
+    elif os.path.exists(csv):
+        os.remove(csv)
+
+
+def read(scenario, datapath):
+    """Reads the delta and the changed profiles of `scenario`
+
+    Fails if the delta is outdated, s. `check`.
+    """
+    with open(path(scenario, datapath)) as f:
+        delta = json.load(f)
+    check(scenario, delta, datapath)
+
+    profiles = None
+    if delta["profiles"] and delta["profiles"]["changed"]:
+        profiles = pd.read_csv(
+            _profiles_path(scenario, datapath), float_precision="round_trip"
+        )
+    return delta, profiles
+
+
+def apply(base, delta, profiles=None):
+    """Inputs of a scenario from the `base` inputs and its `delta`
+
+    `profiles` are the changed profiles of the delta, s. `read`.
+    """
+    data = {}
+    sheets = list(base["data"]) + [
+        typ for typ in delta["columns"] if typ not in base["data"]
+    ]
+    for typ in sheets:
+        df = base["data"].get(
+            typ, pd.DataFrame(index=pd.Index([], name="name"))
+        )
+        columns = delta["columns"].get(typ, list(df.columns))
+        if not any(typ in delta[key] for key in SHEET_KEYS):
+            data[typ] = df
+            continue
+
+        rows = _rows(df)
+        for name in delta["removed"].get(typ, []):
+            del rows[name]
+        for name, cells in delta["changed"].get(typ, {}).items():
+            rows[name].update(cells)
+        rows.update(delta["added"].get(typ, {}))
+        for name in delta["index"].get(typ, []):
+            rows[name] = rows.pop(name)
+        data[typ] = _frame(rows, columns, df.index.name)
+
+    co2_limit = base["co2_limit"]
+    if delta["co2_limit"] is not None:
+        co2_limit = _frame(delta["co2_limit"], ["value"], "bus")
+
+    base_profiles = base["profiles"]
+    if delta["profiles"] is not None:
+        changed = delta["profiles"]["changed"]
+        if changed and len(profiles) != len(base_profiles):
+            raise ValueError("The profiles differ in length from the base.")
+        base_profiles = base_profiles.reindex(
+            columns=delta["profiles"]["columns"]
+        )
+        for column in changed:
+            base_profiles[column] = profiles[column].values
+
+    return dict(base, data=data, co2_limit=co2_limit, profiles=base_profiles)
+
+
+def main():
+    import model
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base", default="REF")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        help="Scenario workbooks (without .xls), default: all.",
+    )
+    parser.add_argument("--datapath", default=model.datapath)
+    args = parser.parse_args()
+
+    scenarios = args.scenarios or [
+        os.path.splitext(f)[0]
+        for f in sorted(os.listdir(args.datapath))
+        if f.endswith(".xls") and f != "carrier-technology.xls"
+    ]
+
+    base = model.read_input(args.base, args.datapath, workbook=True)
+    for scenario in scenarios:
+        if scenario == args.base:
+            continue
+        inputs = model.read_input(scenario, args.datapath, workbook=True)
+        delta, profiles = diff(base, inputs)
+        write(scenario, args.base, delta, profiles, args.datapath)
+        print(
+            "{}: {} changed, {} removed, {} added components, "
+            "{} profiles.".format(
+                scenario,
+                sum(len(v) for v in delta["changed"].values()),
+                sum(len(v) for v in delta["removed"].values()),
+                sum(len(v) for v in delta["added"].values()),
+                len(profiles.columns),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Rolling horizon dispatch of a run with fixed capacities.
+
+The invested capacities of a previous run (`investment_power.csv` and
+`investment_energy.csv`) are added to the existing capacities of the
+dispatchable, volatile, storage and conversion components, nothing is
+expandable. The year is then solved in overlapping windows, e.g. a week with
+one day look-ahead: only the hours of the week are kept, the look-ahead
+avoids emptying the storages at the end of a window. The storage levels at
+the end of the kept hours are the initial levels of the next window, so
+only the model of one window is in memory at a time.
+
+With `carry=False` every window starts with the storage levels of the
+previous run (`filling_levels.csv`) instead. The windows are then
+independent and solved in parallel.
+
+Annual constraints (CO2-limit, RE-share, excess energy) do not apply to
+single windows and are left out, the full load hours (`summed_max`) of the
+dispatchables are limited to the share of the window. Run from the
+repository root, e.g.:
+
+    python scripts/dispatch.py REF --hours 168 --lookahead 24
+
+Results are written to `dispatch/<name>` next to the run in the same format
+as the run, i.e. they can be read with `loader` and `kpi`.
+"""
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pyomo.environ as po
+from oemof.solph import Model
+
+import lowering
+import model
+import solvers
+import writer
+from naming import SCENARIOS, scenario_name
+
+bus = "BB-electricity"
+
+# facades of which the capacities are fixed
+FIXED = ["dispatchable", "volatile", "storage", "conversion"]
+
+# inputs shared with the workers, s. `_init`
+_inputs = {}
+
+# result files of the run copied to the dispatch results
+COPIED = [
+    "capacities.csv",
+    "investment_energy.csv",
+    "investment_power.csv",
+    "run.json",
+]
+
+
+def invested(scenario_path):
+    """Returns the invested power (MW) and energy (MWh) per component"""
+
+    def read(name, row):
+        df = pd.read_csv(os.path.join(scenario_path, name), index_col=0)
+        if df.empty:
+            return pd.Series(dtype=float)
+        return df.loc[row].astype(float)
+
+    return (
+        read("investment_power.csv", "MW"),
+        read("investment_energy.csv", "MWh"),
+    )
+
+
+def fix(data, power, energy):
+    """Adds the invested capacities to the data, nothing is expandable"""
+    data = dict(data)
+    for typ in FIXED + ["link"]:
+        df = data[typ].copy()
+        if typ in FIXED:
+            df["capacity"] = (
+                df["capacity"].fillna(0).add(power.reindex(df.index).fillna(0))
+            )
+        if typ == "storage":
+            df["storage_capacity"] = (
+                df["storage_capacity"]
+                .fillna(0)
+                .add(energy.reindex(df.index).fillna(0))
+            )
+        df["expandable"] = False
+        data[typ] = df
+    return data
+
+
+def windows(timesteps, hours=168, lookahead=24):
+    """Returns (start, stop, end) of all windows, `stop` ends the kept hours"""
+    return [
+        (
+            start,
+            min(start + hours, timesteps),
+            min(start + hours + lookahead, timesteps),
+        )
+        for start in range(0, timesteps, hours)
+    ]
+
+
+def _cost(es, solution, hours):
+    """Variable cost of the kept hours"""
+    cost = 0
+    for (i, o), flow in es.flows().items():
+        values = solution.flows[i, o][:hours]
+        cost += np.dot(values, [flow.variable_costs[t] for t in range(hours)])
+    return cost
+
+
+def solve_window(
+    inputs,
+    carrier_scenario,
+    tech_scenario,
+    wacc,
+    power,
+    energy,
+    window,
+    levels=None,
+    solver=None,
+    threads=None,
+    backend="file",
+):
+    """Solves one window, returns its balance, storage content and cost
+
+    `levels` are the storage contents (MWh) at the start of the window, by
+    default the initial storage levels of the scenario are used.
+    """
+    start, stop, end = window
+    profiles = inputs["profiles"].iloc[start:end]
+    share = (end - start) / len(inputs["profiles"])
+
+    def adjust(data):
+        data = fix(data, power, energy)
+        data["dispatchable"] = data["dispatchable"].copy()
+        data["dispatchable"]["summed_max"] *= share
+        storage = data["storage"]
+        if levels is not None:
+            storage["initial_storage_level"] = (
+                levels.reindex(storage.index) / storage["storage_capacity"]
+            ).fillna(0)
+        # the content at the end is the start of the next window
+        storage["balanced"] = False
+        return data
+
+    es = model.build_energy_system(
+        dict(inputs, profiles=profiles),
+        carrier_scenario,
+        tech_scenario,
+        wacc,
+        adjust,
+    )
+    m = Model(es)
+
+    # excess power limit of the annual model
+    peak_demand = (
+        pd.concat(
+            [
+                inputs["profiles"][l.profile] * l.amount
+                for _, l in inputs["data"]["load"].iterrows()
+            ],
+            axis=1,
+        )
+        .sum(axis=1)
+        .max()
+    )
+
+    def _excess_power_limit(m, t):
+        return m.flow[es.groups[bus], es.groups["el-excess"], t] <= peak_demand
+
+    m.excess_power_limit = po.Constraint(m.TIMESTEPS, rule=_excess_power_limit)
+    lowering.lower(m)
+
+    solvers.solve(m, solver, backend, threads)
+    # the same values and columns as the results of a run, s. `writer`
+    solution = writer.extract(m)
+    del m
+
+    hours = stop - start
+    balance, _ = writer.bus_balance(es, solution, es.groups[bus])
+    content = pd.DataFrame(
+        {
+            n.label: solution.content[n][:hours]
+            for n in sorted(solution.content, key=str)
+        },
+        index=es.timeindex[:hours],
+    )
+
+    return balance.iloc[:hours], content, _cost(es, solution, hours)
+
+
+def _init(inputs):
+    _inputs.update(inputs)
+
+
+def _solve_window(args):
+    return solve_window(_inputs["inputs"], *args)
+
+
+def run(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    sensitivity=None,
+    hours=168,
+    lookahead=24,
+    carry=True,
+    processes=None,
+    datapath=model.datapath,
+    results_path=model.results_path,
+    solver=None,
+    threads=None,
+    wacc=None,
+    backend="file",
+):
+    """Dispatch of the run `scenario` in windows of `hours` hours
+
+    Returns the path of the results.
+    """
+    name = scenario_name(
+        scenario, carrier_scenario, tech_scenario, sensitivity
+    )
+    runs_path = model._runs_path(results_path, wacc)
+    scenario_path = os.path.join(runs_path, name)
+    dispatch_path = os.path.join(runs_path, "dispatch", name)
+
+    inputs = model.read_input(scenario, datapath)
+    power, energy = invested(scenario_path)
+
+    todo = windows(len(inputs["profiles"]), hours, lookahead)
+    start = time.perf_counter()
+
+    if carry:
+        results = []
+        levels = None
+        for window in todo:
+            result = solve_window(
+                inputs,
+                carrier_scenario,
+                tech_scenario,
+                wacc,
+                power,
+                energy,
+                window,
+                levels,
+                solver,
+                threads,
+                backend,
+            )
+            levels = result[1].iloc[-1]
+            results.append(result)
+    else:
+        filling_levels = pd.read_csv(
+            os.path.join(scenario_path, "filling_levels.csv"), index_col=0
+        )
+        tasks = [
+            (
+                carrier_scenario,
+                tech_scenario,
+                wacc,
+                power,
+                energy,
+                window,
+                # content at the end of the hour before the window
+                None if window[0] == 0 else filling_levels.iloc[window[0] - 1],
+                solver,
+                threads,
+                backend,
+            )
+            for window in todo
+        ]
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init,
+            initargs=({"inputs": inputs},),
+        ) as pool:
+            results = list(pool.map(_solve_window, tasks))
+
+    print(
+        "Solved {} windows of {} in {:.1f} s.".format(
+            len(todo), name, time.perf_counter() - start
+        )
+    )
+
+    write(scenario_path, dispatch_path, results)
+
+    return dispatch_path
+
+
+def write(scenario_path, dispatch_path, results):
+    """Writes the results of all windows in the format of a run"""
+    os.makedirs(dispatch_path, exist_ok=True)
+
+    balance, content, cost = zip(*results)
+    pd.concat(balance).to_csv(os.path.join(dispatch_path, bus + ".csv"))
+    pd.concat(content).to_csv(
+        os.path.join(dispatch_path, "filling_levels.csv")
+    )
+
+    for name in COPIED:
+        path = os.path.join(scenario_path, name)
+        if os.path.exists(path):
+            shutil.copy(path, dispatch_path)
+
+    # variable cost of the dispatch and the investment cost of the run
+    investment = 0
+    for name in ["investment_power.csv", "investment_energy.csv"]:
+        df = pd.read_csv(os.path.join(scenario_path, name), index_col=0)
+        investment += np.prod(df.values.astype(float), axis=0).sum()
+
+    pd.Series(
+        [sum(cost), investment, sum(cost) + investment],
+        index=["Variable cost", "Investment cost", "Objective value"],
+    ).to_csv(os.path.join(dispatch_path, "costs.csv"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenario")
+    parser.add_argument("--carrier-scenario")
+    parser.add_argument("--tech-scenario")
+    parser.add_argument(
+        "--sensitivity",
+        type=float,
+        help="RE-share of the run, e.g. 1 for the run REF-100.",
+    )
+    parser.add_argument("--wacc", type=float)
+    parser.add_argument(
+        "--hours", type=int, default=168, help="Hours kept per window."
+    )
+    parser.add_argument(
+        "--lookahead",
+        type=int,
+        default=24,
+        help="Hours solved after each window, but not kept.",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Start all windows with the storage levels of the run and "
+        "solve them in parallel.",
+    )
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--datapath", default=model.datapath)
+    parser.add_argument("--results-path", default=model.results_path)
+    parser.add_argument("--solver")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--backend", choices=solvers.BACKENDS, default="file")
+    args = parser.parse_args()
+
+    defaults = {s: (c, t) for s, c, t in SCENARIOS}
+    carrier, tech = defaults.get(args.scenario, ("base", "reference"))
+
+    path = run(
+        args.scenario,
+        args.carrier_scenario or carrier,
+        args.tech_scenario or tech,
+        args.sensitivity,
+        args.hours,
+        args.lookahead,
+        not args.parallel,
+        args.processes,
+        args.datapath,
+        args.results_path,
+        args.solver,
+        args.threads,
+        args.wacc,
+        args.backend,
+    )
+    print("Dispatch done. Results are in {}.".format(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Construction of the integral expressions of the custom constraints.
+
+A generator `sum(m.flow[i, o, t] * weights[t] for ...)` makes Pyomo build
+a new expression object for every addition, which is slow and memory
+hungry for all flows times 8760 timesteps. `flow_sum` computes the
+coefficients with numpy and passes them together with the variables as
+one `LinearExpression`, so the expression is created in a single step.
+
+Use `flow_sum` for all constraints that sum flows over the timesteps,
+s. `scripts/benchmark-expressions.py` for the construction times.
+"""
+
+import numpy as np
+import pyomo.environ as po
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+
+def flow_sum(m, flows, weights=None, factors=None):
+    """Returns the (weighted) sum of `flows` over all timesteps
+
+        sum_(i, o) sum_t factors[i, o] * weights[t] * flow[i, o, t]
+
+    `weights` is indexed by timestep (default: 1), `factors` maps the flows
+    to a constant factor (default: 1).
+    """
+    timesteps = list(m.TIMESTEPS)
+    if weights is None:
+        weights = np.ones(len(timesteps))
+    else:
+        weights = np.asarray(weights, dtype=float)[timesteps]
+
+    coefficients = []
+    variables = []
+    for i, o in flows:
+        factor = 1 if factors is None else factors[i, o]
+        coefficients.append(weights * factor)
+        variables.extend(m.flow[i, o, t] for t in timesteps)
+
+    if not variables:
+        return 0
+
+    return LinearExpression(
+        constant=0,
+        linear_coefs=np.concatenate(coefficients).tolist(),
+        linear_vars=variables,
+    )
+
+
+def integral_limit(m, keyword, limit, weights=None):
+    """Replacement of `oemof.solph.constraints.generic_integral_limit`
+
+    Components are named like the solph ones, so the results (e.g. the CO2
+    shadow price) can be written in the same way.
+    """
+    factors = {
+        (i, o): getattr(m.flows[i, o], keyword)
+        for (i, o) in m.flows
+        if hasattr(m.flows[i, o], keyword)
+    }
+
+    setattr(
+        m,
+        "integral_limit_" + keyword,
+        po.Expression(expr=flow_sum(m, factors, weights, factors)),
+    )
+    setattr(
+        m,
+        "integral_limit_" + keyword + "_constraint",
+        po.Constraint(expr=getattr(m, "integral_limit_" + keyword) <= limit),
+    )
+
+    return m
@@ -0,0 +1,119 @@
+"""
+Hour by day arrays of the hourly results of runs for heatmaps.
+
+`load` reads only the requested technologies of the requested runs and
+reshapes them into one array of shape (scenarios, techs, 24, 365), with the
+hours of the day as rows and the days of the year as columns:
+
+    heatmaps = heatmap.load(path, ["REF", "REF-100"], ["hydro-phs"])
+    heatmaps.data[1, 0]  # hydro-phs of REF-100, hour x day
+
+Time zone aware results are shown in local time: the hour skipped at the
+change to daylight saving time is interpolated, the two values of the hour
+repeated at the change back are averaged. The files of runs in a zone with
+daylight saving time only have the UTC offset of every hour, their zone is
+passed as `tz`, e.g. `heatmap.load(path, tz="Europe/Berlin")`. Without it
+the results are shown with the UTC offset of their first hour. The 29th of
+February of leap years is dropped. Runs shorter than a year and technologies
+a run does not have are NaN.
+"""
+
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import loader
+
+HOURS = 24
+DAYS = 365
+
+Heatmaps = collections.namedtuple("Heatmaps", ["data", "scenarios", "techs"])
+Heatmaps.__doc__ = """Result of `load`
+
+data: array (scenarios, techs, 24, 365) of the hour of the day by the day of
+    the year
+scenarios, techs: labels of the first two axes of `data`
+"""
+
+
+def grid(year):
+    """Hourly index of `year` without the 29th of February"""
+    index = pd.date_range(
+        "{}-01-01".format(year), "{}-12-31 23:00".format(year), freq="H"
+    )
+    return index[~((index.month == 2) & (index.day == 29))]
+
+
+def hour_by_day(df):
+    """Reshapes the hourly `df` into an array (columns, 24, 365)"""
+    aware = df.index.tz is not None
+    if aware:
+        # local wall time, the repeated hour of the change back is averaged
+        df = df.tz_localize(None)
+        df = df.groupby(level=0).mean()
+
+    index = grid(df.index[0].year)
+    if not df.index.equals(index):
+        df = df.reindex(index)
+        if aware:
+            df = df.interpolate(limit=1, limit_area="inside")
+
+    return df.values.reshape(DAYS, HOURS, -1).transpose(2, 1, 0)
+
+
+def columns(scenario_path):
+    """Names of the columns of the hourly results of a run"""
+    return list(
+        pd.read_csv(
+            os.path.join(scenario_path, loader.bus + ".csv"), nrows=0
+        ).columns[1:]
+    )
+
+
+def read(scenario_path, techs, tz=None):
+    """Reads the hourly results of `techs` of a run, missing ones are NaN
+
+    The index is in the time zone `tz`, s. `load`.
+    """
+    available = columns(scenario_path)
+    df = pd.read_csv(
+        os.path.join(scenario_path, loader.bus + ".csv"),
+        index_col=0,
+        usecols=[0]
+        + [available.index(t) + 1 for t in techs if t in available],
+    )
+    # mixed UTC offsets (daylight saving time) are only parsed in UTC
+    first = pd.Timestamp(df.index[0])
+    if first.tz is None:
+        df.index = pd.to_datetime(df.index)
+    else:
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(
+            tz or first.tz
+        )
+    return df.reindex(columns=techs)
+
+
+def load(path, scenarios=None, techs=None, workers=None, tz=None):
+    """Hour by day arrays of `techs` of the runs `scenarios` in `path`
+
+    Default are all runs and all technologies of these runs. Only the
+    columns of `techs` are read, runs are read in parallel. `tz` is the time
+    zone of the runs, s. above.
+    """
+    scenarios = scenarios or loader.runs(path)
+    paths = [os.path.join(path, s) for s in scenarios]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if techs is None:
+            techs = []
+            for available in pool.map(columns, paths):
+                techs += [t for t in available if t not in techs]
+
+        data = np.full((len(scenarios), len(techs), HOURS, DAYS), np.nan)
+        for i, df in enumerate(pool.map(lambda p: read(p, techs, tz), paths)):
+            data[i] = hour_by_day(df)
+
+    return Heatmaps(data, list(scenarios), list(techs))
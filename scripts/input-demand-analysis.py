@@ -1,38 +1,18 @@
 import pandas as pd
 #from datetime import datetime
-import numpy as np
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 import matplotlib.pyplot as plt
-from scipy import interpolate
 
-# some processing stuff
-df = pd.read_excel(
-    "data/cruise-arrivals.xlsx",
-    dtype= {"YEAR":int, "ARRIVED DATE": str, "TIME": str, "HOURS": str})
-df = df[df["Year"] == 2018]
-
-df["ARRIVAL"] =  pd.to_datetime(df["ARRIVED DATE"] + " " + df["TIME"] )
-df["DEPATURE"] = df["ARRIVAL"] + pd.to_timedelta(df['HOURS'],"h")
-
-# create function to interpolate based on relative time length stay of ship
-demand = np.array([12, 12, 10, 6, 4, 4, 4, 4, 6, 10, 12, 12])
-timerel = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])/11
-f = interpolate.interp1d(timerel, demand)
+import cruise_profile as cruise
 
-# create demand profiles for every arrived ships based on its duration
-stays = {}
-for _, row in df.iterrows():
-    df_ = pd.DataFrame(index= pd.date_range(row["ARRIVAL"], row["DEPATURE"], freq="h"))
-    df_["timerel"] = [i/len(df_) for i in range(1, len(df_)+1)]
-    df_["demand"] = df_.apply(lambda x: f(x["timerel"]), axis=1)
-    stays[_] = df_
+# some processing stuff
+df = cruise.read_arrivals("data/cruise-arrivals.xlsx", year=2018)
 
-# concat, resample and aggregated values,
-demand_agg = pd.concat(stays.values(), axis=0).sort_index()
-demand_agg_sum = demand_agg.resample("H").sum()
-demand_agg_sum.sum()
-# fix missing indices and fillna with 0
-demand_agg_sum = demand_agg_sum.reindex(pd.date_range(start="2018", periods=8760, freq="H")).fillna(0)["demand"]
+# demand profiles of all arrived ships based on their duration, aggregated
+# to the hours of the year, s. scripts/cruise_profile.py
+demand_agg_sum = cruise.profile(
+    df["ARRIVAL"], df["DEPATURE"], start="2018", normalize=False
+)
 
 cruise_profile = demand_agg_sum / demand_agg_sum.sum()
 cruise_profile.to_csv("data/cruise_ship_profile.csv")
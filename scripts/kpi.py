@@ -0,0 +1,165 @@
+"""
+Incremental cache of the key performance indicators of every run.
+
+The KPIs of a run (LCOE, RE share, energy balance, peak demand, share of
+dispatchable capacity, investment cost, ...) are stored in `kpis.json` in
+the run directory together with the size, modification time and content
+hash of the result files they were computed from. `load` only recomputes
+runs whose result files changed, all others are read from their cache.
+Like in `cache` (whose helpers are used), the content hash is only computed
+if size or modification time of a file changed.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import cache
+import loader
+
+# increase if the computed KPIs change, invalidates all caches
+VERSION = 1
+
+FILES = [
+    "BB-electricity.csv",
+    "capacities.csv",
+    "costs.csv",
+    "filling_levels.csv",
+    "investment_energy.csv",
+    "investment_power.csv",
+]
+
+conventionals = ["hfo-lsce", "hfo-msce"]
+
+dispatchables = [
+    "hfo-lsce",
+    "hfo-msce",
+    "bagasse-st",
+    "waste-ocgt",
+    "hydro-phs",
+    "lithium-battery",
+]
+
+# KPIs per component, all others are scalars
+SERIES = [
+    "energy",
+    "balance",
+    "capacities",
+    "storage_capacity",
+    "investment_cost",
+]
+
+
+def _files(scenario_path, cached=None):
+    """Returns stat and hash of the result files, hashes only changed ones"""
+    cached = cached or {}
+    files = {}
+    for name in FILES:
+        path = os.path.join(scenario_path, name)
+        if not os.path.exists(path):
+            continue
+        stat = cache._stat(path)
+        old = cached.get(name, {})
+        if {k: old.get(k) for k in stat} == stat:
+            files[name] = old
+        else:
+            files[name] = dict(stat, sha1=cache._hash(path))
+    return files
+
+
+def compute(scenario_path):
+    """Computes the KPIs of a run from its result files"""
+    run = loader.load_run(scenario_path)
+
+    energy = run["energy"]
+    demand = energy[[c for c in energy.index if "load" in c]].sum()
+    capacity = run["all_capacities"].groupby(level=0).sum()
+    dispatchable = capacity.reindex(dispatchables).sum()
+
+    kpis = {
+        "objective": run["objective"],
+        "LCOE": run["objective"] / demand / 1000,
+        "RE share": 1 - energy.reindex(conventionals).sum() / demand,
+        "demand": demand,
+        "peak demand": run["peak_demand"],
+        "dispatchable capacity": dispatchable,
+        "dispatchable share": dispatchable / run["peak_demand"],
+        "investment cost": run["investment_cost"].sum(),
+    }
+    for name in SERIES:
+        kpis[name] = run[name].dropna().to_dict()
+
+    return kpis
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _hashes(files):
+    return {name: f["sha1"] for name, f in files.items()}
+
+
+def kpis(scenario_path):
+    """Returns the KPIs of a run, recomputes them if its results changed"""
+    path = os.path.join(scenario_path, "kpis.json")
+    cached = _read(path)
+
+    if cached is not None and cached.get("version") == VERSION:
+        files = _files(scenario_path, cached["files"])
+        if _hashes(files) == _hashes(cached["files"]):
+            if files != cached["files"]:
+                # only the modification times changed, e.g. after a copy
+                cached["files"] = files
+                _write(path, cached)
+            return cached["kpis"]
+    else:
+        files = _files(scenario_path)
+
+    result = {
+        "version": VERSION,
+        "files": files,
+        "kpis": compute(scenario_path),
+    }
+    _write(path, result)
+
+    return result["kpis"]
+
+
+def _write(path, content):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(content, f, indent=2)
+
+    cache._replace(path, write)
+
+
+def load(path, scenarios=None, workers=None):
+    """Returns the KPIs of the runs `scenarios` (default: all) in `path`
+
+    Returns a frame with one row per scalar KPI and a dictionary of frames
+    for the KPIs per component (s. `SERIES`), all with one column per run.
+    """
+    scenarios = scenarios or loader.runs(path)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(
+            pool.map(kpis, [os.path.join(path, s) for s in scenarios])
+        )
+
+    scalars = pd.DataFrame(
+        [{k: v for k, v in run.items() if k not in SERIES} for run in loaded],
+        index=scenarios,
+    ).T
+    series = {
+        name: pd.DataFrame([run[name] for run in loaded], index=scenarios).T
+        for name in SERIES
+    }
+
+    return scalars, series
@@ -0,0 +1,150 @@
+"""
+One-pass loader for the results of all runs in a results directory.
+
+Every result file of a run is read exactly once, runs are read in parallel.
+The per-run values are collected in lists and concatenated once at the end,
+so loading is linear in the number of runs.
+
+    results = loader.load(path)
+    results.objective["REF"]
+"""
+
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+bus = "BB-electricity"
+
+phs_storages = ["hydro-phs"]
+storages = ["lithium-battery", "hydro-phs"]
+
+Results = collections.namedtuple(
+    "Results",
+    [
+        "energy",
+        "balance",
+        "capacities",
+        "all_capacities",
+        "storage_capacity",
+        "peak_demand",
+        "objective",
+        "investment_cost",
+        "hourly",
+    ],
+)
+Results.__doc__ = """Result of `load`, all frames have one column per run
+
+energy: sum of the bus balance per component
+balance: energy with storage charge/discharge split and negative demand
+capacities: capacities per carrier-tech
+all_capacities: capacities per (component, to, carrier, tech, type)
+storage_capacity: maximum filling level per storage
+peak_demand: peak of the sum of all loads (Series)
+objective: objective value (Series)
+investment_cost: annualised investment cost per component
+hourly: dictionary of the hourly bus balance per run
+"""
+
+
+def runs(path):
+    """Returns the names of all run directories in `path`"""
+    return sorted(
+        name
+        for name in os.listdir(path)
+        if os.path.isfile(os.path.join(path, name, "costs.csv"))
+    )
+
+
+def _balance(hourly):
+    temp = hourly.copy()
+    temp["phs-cos"] = temp[phs_storages].clip(upper=0).sum(axis=1)
+    temp["phs"] = temp[phs_storages].clip(lower=0).sum(axis=1)
+    temp["battery-cos"] = temp["lithium-battery"].clip(upper=0)
+    temp["battery"] = temp["lithium-battery"].clip(lower=0)
+
+    loads = ["el-load", "ev-load", "el-excess"]
+    for cruiseload in ["cruise-load-1", "cruise-load", "cruise-load-2"]:
+        if cruiseload in temp.columns:
+            loads.append(cruiseload)
+            break
+    temp[loads] = temp[loads] * -1
+
+    return temp.sum().drop(storages)
+
+
+def _investment_cost(power, energy):
+    cost = power.iloc[0] * power.iloc[1]
+    cost.loc[energy.columns] = cost.loc[energy.columns] + (
+        energy.iloc[0] * energy.iloc[1]
+    )
+    return cost
+
+
+def load_run(scenario_path):
+    """Reads all files of one run and computes its values"""
+
+    def read(name, **kwargs):
+        return pd.read_csv(
+            os.path.join(scenario_path, name + ".csv"), index_col=0, **kwargs
+        )
+
+    hourly = read(bus, parse_dates=True)
+    capacities = read("capacities")
+    filling_levels = read("filling_levels")
+
+    loads = [c for c in hourly.columns if "load" in c]
+
+    by_tech = capacities.groupby(["carrier", "tech"])["value"].sum()
+    by_tech.index = ["-".join(i) for i in by_tech.index]
+
+    return {
+        "energy": hourly.sum(),
+        "balance": _balance(hourly),
+        "capacities": by_tech,
+        "all_capacities": capacities.set_index(
+            ["to", "carrier", "tech", "type"], append=True
+        )["value"],
+        "storage_capacity": filling_levels.max(),
+        "peak_demand": hourly[loads].sum(axis=1).max(),
+        "objective": read("costs").iloc[:, 0]["Objective value"],
+        "investment_cost": _investment_cost(
+            read("investment_power"), read("investment_energy")
+        ),
+        "hourly": hourly,
+    }
+
+
+def read(paths, keys, workers=None):
+    """Loads the runs in `paths` in parallel, columns are named by `keys`
+
+    `keys` is a list of run names or a `pd.MultiIndex`.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(load_run, paths))
+
+    def collect(field):
+        df = pd.concat([run[field] for run in loaded], axis=1, sort=False)
+        df.columns = keys
+        return df
+
+    return Results(
+        energy=collect("energy"),
+        balance=collect("balance"),
+        capacities=collect("capacities"),
+        all_capacities=collect("all_capacities"),
+        storage_capacity=collect("storage_capacity"),
+        peak_demand=pd.Series(
+            [run["peak_demand"] for run in loaded], index=keys
+        ),
+        objective=pd.Series([run["objective"] for run in loaded], index=keys),
+        investment_cost=collect("investment_cost"),
+        hourly={k: run["hourly"] for k, run in zip(keys, loaded)},
+    )
+
+
+def load(path, scenarios=None, workers=None):
+    """Loads the runs `scenarios` (default: all) in `path` in parallel"""
+    scenarios = scenarios or runs(path)
+    return read([os.path.join(path, s) for s in scenarios], scenarios, workers)
@@ -0,0 +1,102 @@
+"""
+Lowering of single variable constraints to variable bounds.
+
+Constraints like the excess power limit `flow[bus, excess, t] <= peak` are
+one row per timestep in the LP, but only bound one variable. `lower` finds
+these constraints in a built model, tightens the bounds of their variables
+instead and deactivates them, so they are neither written nor passed to the
+solver:
+
+    m = Model(es)
+    add_constraints(m, es, inputs)
+    lowered = lowering.lower(m)
+
+Only the constraints added to the model itself are checked, not the ones of
+the solph blocks (e.g. the bus balances, whose duals are the prices).
+Constraints are checked per component: the rows of an indexed constraint
+are built by the same rule, so a component is skipped if its first row has
+more than one variable. Rows with mutable parameters (e.g. the RE share of
+`model.sweep`) are kept, their bound would not follow the parameter. Lowered
+rows have no duals, their shadow price is the reduced cost of the variable.
+"""
+
+import pyomo.environ as po
+from pyomo.core.expr.numvalue import is_constant, value
+from pyomo.repn import generate_standard_repn
+
+
+def _single(c):
+    """Returns (coefficient, variable, constant) if `c` bounds one variable"""
+    if c.body.is_variable_type():
+        return None if c.body.fixed else (1, c.body, 0)
+
+    repn = generate_standard_repn(c.body, compute_values=False)
+    if not repn.is_linear() or len(repn.linear_vars) != 1:
+        return None
+    coefficient = repn.linear_coefs[0]
+    if not (is_constant(coefficient) and is_constant(repn.constant)):
+        return None
+    return value(coefficient), repn.linear_vars[0], value(repn.constant)
+
+
+def _bound(c, coefficient, variable, constant):
+    for bound in [c.lower, c.upper]:
+        if bound is not None and not is_constant(bound):
+            return False
+    if coefficient == 0:
+        return False
+
+    lower, upper = [
+        None if b is None else (value(b) - constant) / coefficient
+        for b in [c.lower, c.upper]
+    ]
+    if coefficient < 0:
+        lower, upper = upper, lower
+
+    if lower is not None and (variable.lb is None or lower > variable.lb):
+        variable.setlb(lower)
+    if upper is not None and (variable.ub is None or upper < variable.ub):
+        variable.setub(upper)
+    c.deactivate()
+    return True
+
+
+def lower(m, names=None):
+    """Replaces single variable constraints of `m` by variable bounds
+
+    Only the constraint components `names` are checked if given. Returns
+    the number of eliminated rows per constraint component.
+    """
+    lowered = {}
+    for component in m.component_objects(
+        po.Constraint, active=True, descend_into=False
+    ):
+        if names is not None and component.local_name not in names:
+            continue
+        rows = [c for c in component.values() if c.active]
+        if not rows or _single(rows[0]) is None:
+            continue
+
+        count = 0
+        for c in rows:
+            single = _single(c)
+            if single is not None and _bound(c, *single):
+                count += 1
+        if count:
+            lowered[component.name] = count
+
+    return lowered
+
+
+def report(lowered):
+    """Prints the eliminated rows of `lower`"""
+    if not lowered:
+        return
+    print(
+        "Lowered {} rows to bounds: {}.".format(
+            sum(lowered.values()),
+            ", ".join(
+                "{} ({})".format(k, v) for k, v in sorted(lowered.items())
+            ),
+        )
+    )
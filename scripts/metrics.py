@@ -0,0 +1,146 @@
+"""
+Lightweight instrumentation of the stages of the model pipeline.
+
+A recorder is started per run, every stage wrapped into `stage` then records
+its wall time, CPU time, the peak of the memory allocated by Python during
+the stage (tracemalloc) and the peak resident memory of the process and the
+solver processes so far (RSS). Without a started recorder `stage` does
+nothing, so the pipeline can always be instrumented:
+
+    metrics.start()
+    with metrics.stage("model"):
+        m = build_model(es, inputs)
+    metrics.record_model(m)
+    metrics.write(scenario_path)
+
+writes `run_metrics.json`. tracemalloc slows down the allocations of Python
+noticeably, it can be switched off with `start(memory=False)`.
+"""
+
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+import pyomo.environ as po
+from pyomo.core.expr.visitor import identify_variables
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# recorder of the current run, None if disabled
+_current = None
+
+
+def start(memory=True):
+    """Starts recording the stages of a run"""
+    global _current
+    # e.g. a failed run before in the same process
+    stop()
+    _current = {"memory": memory, "stages": {}, "model": None}
+    if memory:
+        tracemalloc.start()
+    return _current
+
+
+def stop():
+    """Stops recording, returns the metrics of the run"""
+    global _current
+    current, _current = _current, None
+    if current is not None and current["memory"]:
+        tracemalloc.stop()
+    return current
+
+
+def active():
+    return _current is not None
+
+
+def _rss():
+    """Peak RSS of the process and its finished children in MB"""
+    if resource is None:
+        return None, None
+    # kilobytes on Linux
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3,
+    )
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Records a stage, yields a dictionary for additional values"""
+    info = {}
+    if _current is None:
+        yield info
+        return
+
+    if _current["memory"]:
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.clear_traces()
+        before = tracemalloc.get_traced_memory()[0]
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield info
+    finally:
+        record = {
+            "wall": time.perf_counter() - wall,
+            "cpu": time.process_time() - cpu,
+        }
+        if _current["memory"]:
+            peak = tracemalloc.get_traced_memory()[1]
+            record["tracemalloc_peak_mb"] = (peak - before) / 1e6
+        record["rss_peak_mb"], record["solver_rss_peak_mb"] = _rss()
+        record.update(info)
+        _current["stages"][name] = record
+
+
+def model_size(m):
+    """Number of variables, constraints and nonzeros of the model"""
+    variables = sum(len(v) for v in m.component_objects(po.Var, active=True))
+    constraints = 0
+    nonzeros = 0
+    for c in m.component_data_objects(po.Constraint, active=True):
+        constraints += 1
+        nonzeros += sum(
+            1 for _ in identify_variables(c.body, include_fixed=False)
+        )
+    return {
+        "variables": variables,
+        "constraints": constraints,
+        "nonzeros": nonzeros,
+    }
+
+
+def record_model(m):
+    """Records the size of the model, does nothing without recorder"""
+    if _current is None:
+        return
+    with stage("model size"):
+        _current["model"] = model_size(m)
+
+
+def write(scenario_path, **info):
+    """Writes the metrics of the current run to `run_metrics.json`"""
+    if _current is None:
+        return
+    content = dict(
+        info,
+        stages=_current["stages"],
+        model=_current["model"],
+        total={
+            "wall": sum(s["wall"] for s in _current["stages"].values()),
+            "cpu": sum(s["cpu"] for s in _current["stages"].values()),
+        },
+    )
+    os.makedirs(scenario_path, exist_ok=True)
+    with open(os.path.join(scenario_path, "run_metrics.json"), "w") as f:
+        json.dump(content, f, indent=2)
@@ -0,0 +1,1256 @@
+"""
+Headless version of the model pipeline in `model.ipynb`.
+
+Every combination of scenario, carrier scenario, technology scenario and
+RE-share sensitivity is one task. Tasks are distributed over a process pool,
+each worker solving one model at a time with a limited number of solver
+threads. Run from the repository root, e.g.:
+
+    python scripts/model.py --scenarios REF NPHS --sensitivities 1 \
+        --processes 8 --threads 4
+
+Solver, backend and their tuning are selected with `--profile`, e.g.
+`--profile highs-ipm` for the barrier of HiGHS without crossover, s.
+`solvers.PROFILES`.
+
+With `--weather-years` every task is solved once per weather year with the
+wind and solar profiles of that year (s. `weather`), the spread of the
+capacities and LCOE over the years is written to `weather-spread`.
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import pyomo.environ as po
+from oemof.solph import EnergySystem, Model, Bus
+import oemof.tabular.facades as fc
+
+import aggregation as tsa
+import cache
+import delta
+import expressions
+import kpi
+import lowering
+import metrics
+import parameters
+import naming
+import reduction
+from naming import SCENARIOS, scenario_name
+import solvers
+import store
+import weather
+import writer
+
+# environment variables read by the BLAS/OpenMP runtimes of the solvers
+THREAD_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+]
+
+datapath = os.path.join(os.getcwd(), "scenarios")
+
+results_path = os.path.join(
+    os.path.expanduser("~"), "oemof-results", "barbados"
+)
+
+# profiles of the scenario workbooks that depend on the weather year
+WEATHER_PROFILES = {
+    "BB-wind-onshore-profile-zone-4-2006": ("wind", "zone-4"),
+    "BB-pv-distributed-profile": ("solar", "trents"),
+    "BB-pv-utility-profile": ("solar", "trents"),
+}
+
+# buses whose hourly prices (duals of the balance) are written to prices.csv
+PRICES = ["BB-electricity"]
+
+# inputs read once by the main process, shared with the workers
+_inputs = {}
+
+# `EnergySystem` of the last run of this process, s. `prepare`
+_built = {}
+
+
+def read_input(scenario, datapath=datapath, workbook=False):
+    """Reads the scenario workbook and the carrier/technology data
+
+    Scenarios with a delta are read as their base with the delta applied,
+    unless `workbook` is set, s. `delta`.
+    """
+    if not workbook and delta.exists(scenario, datapath):
+        changes, profiles = delta.read(scenario, datapath)
+        return delta.apply(
+            read_input(changes["base"], datapath), changes, profiles
+        )
+
+    path = os.path.join(datapath, scenario + ".xls")
+    carrier_technology_path = os.path.join(datapath, "carrier-technology.xls")
+
+    technology = cache.read_sheet(
+        carrier_technology_path,
+        sheet_name="technology-data",
+        index_col=[0, 1, 2],
+    )
+    carrier = cache.read_sheet(
+        carrier_technology_path, sheet_name="carrier", index_col=[0, 1]
+    )
+
+    sheet_names = [
+        typ for typ in cache.sheet_names(path) if typ in fc.TYPEMAP.keys()
+    ]
+
+    data = {}
+    for sheet in sheet_names:
+        data[sheet] = cache.read_sheet(path, sheet_name=sheet, index_col=0)
+
+    profiles = cache.read_sheet(
+        path,
+        sheet_name="profiles",
+        index_col=0,
+        parse_dates=True,
+    )
+    profiles.index.freq = "1H"
+
+    if "co2-limit" in cache.sheet_names(path):
+        co2_limit = cache.read_sheet(path, sheet_name="co2-limit", index_col=0)
+    else:
+        co2_limit = None
+
+    return {
+        "data": data,
+        "technology": technology,
+        "carrier": carrier,
+        "profiles": profiles,
+        "co2_limit": co2_limit,
+    }
+
+
+def swap_weather(profiles, weather_year):
+    """Replaces the volatile profiles by the ones of `weather_year`"""
+    profiles = profiles.copy()
+    for column, (carrier, zone) in WEATHER_PROFILES.items():
+        if column in profiles.columns:
+            profiles[column] = weather.scenario_profile(
+                carrier, weather_year, zone
+            )
+    return profiles
+
+
+def _none(number):
+    if pd.isna(number):
+        return None
+    else:
+        return number
+
+
+def build_energy_system(
+    inputs,
+    carrier_scenario,
+    tech_scenario,
+    wacc=None,
+    adjust=None,
+    reduce=False,
+    previous=None,
+):
+    """Creates the `EnergySystem` with all buses and components
+
+    If `wacc` is given it replaces the wacc of all technologies. `adjust` is
+    called with the resolved data of all components before they are
+    created, e.g. to fix their capacities (s. `dispatch`). With `reduce`
+    identical components are merged and dead ones dropped, the
+    `EnergySystem` of all components and the reduction are kept as its
+    attribute `reduction`, s. `reduction`. A `previous` `EnergySystem` is
+    changed in place if possible, s. `patch_energy_system`.
+    """
+    data = parameters.resolve(
+        inputs["data"],
+        inputs["technology"],
+        inputs["carrier"],
+        carrier_scenario,
+        tech_scenario,
+        wacc,
+    )
+    if adjust is not None:
+        data = adjust(data)
+    profiles = inputs["profiles"]
+
+    if not reduce:
+        if previous is not None:
+            if patch_energy_system(previous, data, profiles) is not None:
+                return previous
+        return create_energy_system(data, profiles)
+
+    reduced, r = reduction.reduce(data, profiles)
+    es = create_energy_system(reduced, profiles)
+    es.reduction = r._replace(full=create_energy_system(data, profiles))
+    return es
+
+
+def _load(name, l, buses, profiles):
+    return fc.Load(
+        label=name,
+        bus=buses[l.bus],
+        amount=l.amount,
+        profile=profiles[l.profile],
+    )
+
+
+def _dispatchable(name, g, buses, profiles):
+    g = g.to_dict()
+    return fc.Dispatchable(
+        label=name,
+        bus=buses[g["bus"]],
+        carrier=g["carrier"],
+        tech=g["tech"],
+        marginal_cost=g["marginal_cost"],
+        expandable=g.get("expandable", False),
+        capacity=g["capacity"],
+        capacity_potential=None,
+        capacity_cost=_none(g["capacity_cost"]),
+        output_parameters={
+            "emission_factor": g["emission_factor"],
+            "summed_max": g["summed_max"],
+        },
+    )
+
+
+def _volatile(name, v, buses, profiles):
+    return fc.Volatile(
+        label=name,
+        bus=buses[v.bus],
+        carrier=v.carrier,
+        tech=v.tech,
+        expandable=v.expandable,
+        capacity=v.capacity,
+        capacity_potential=v.capacity_potential,
+        capacity_cost=_none(v.capacity_cost),
+        profile=profiles[v.profile],
+    )
+
+
+def _storage(name, s, buses, profiles):
+    s = s.to_dict()
+    return fc.Storage(
+        label=name,
+        bus=buses[s["bus"]],
+        carrier=s["carrier"],
+        tech=s["tech"],
+        marginal_cost=s["marginal_cost"],
+        capacity=s["capacity"],
+        storage_capacity=s["storage_capacity"],
+        storage_capacity_potential=s["storage_capacity_potential"],
+        min_storage_level=s.get("min_storage_level", 0),
+        expandable=s["expandable"],
+        efficiency=s["efficiency"],
+        loss_rate=s["loss_rate"],
+        initial_storage_level=s["initial_storage_level"],
+        balanced=s.get("balanced", True),
+        invest_relation_output_capacity=_none(
+            s.get("invest_relation_output_capacity")
+        ),
+        invest_relation_input_capacity=_none(
+            s.get("invest_relation_input_capacity")
+        ),
+        storage_capacity_cost=s["storage_capacity_cost"],
+        capacity_cost=_none(s["capacity_cost"]),
+    )
+
+
+def _conversion(name, c, buses, profiles):
+    return fc.Conversion(
+        label=name,
+        from_bus=buses[c.from_bus],
+        to_bus=buses[c.to_bus],
+        carrier=c.carrier,
+        tech=c.tech,
+        efficiency=c.efficiency,
+        marginal_cost=c.vom,
+        carrier_cost=c.carrier_cost,
+        expandable=c.expandable,
+        capacity=c.capacity,
+        capacity_potential=c.capacity_potential,
+        capacity_cost=_none(c.capacity_cost),
+        output_parameters={"emission_factor": c.emission_factor},
+    )
+
+
+def _commodity(name, c, buses, profiles):
+    return fc.Commodity(
+        label=name,
+        bus=buses[c.bus],
+        carrier=c.carrier,
+        tech=c.tech,
+        amount=c.amount,
+    )
+
+
+def _link(name, c, buses, profiles):
+    return fc.Link(
+        label=name,
+        from_bus=buses[c.from_bus],
+        to_bus=buses[c.to_bus],
+        capacity=c.capacity,
+        expandable=c.expandable,
+        capacity_cost=c.annuity,
+        loss=c.loss,
+    )
+
+
+def _excess(name, e, buses, profiles):
+    return fc.Excess(label=name, bus=buses[e.bus])
+
+
+def _shortage(name, s, buses, profiles):
+    return fc.Shortage(
+        label=name,
+        carrier="electricity",
+        tech="shortage",
+        bus=buses[s.bus],
+        marginal_cost=s.marginal_cost,
+    )
+
+
+# facades of the component sheets in the order they are created
+FACADES = [
+    ("load", _load),
+    ("dispatchable", _dispatchable),
+    ("volatile", _volatile),
+    ("storage", _storage),
+    ("conversion", _conversion),
+    ("commodity", _commodity),
+    ("link", _link),
+    ("excess", _excess),
+    ("shortage", _shortage),
+]
+
+
+def create_energy_system(data, profiles):
+    """Creates the `EnergySystem` of the resolved `data` of all components
+
+    `data` and `profiles` are kept as attributes of the `EnergySystem`, s.
+    `patch_energy_system`.
+    """
+    es = EnergySystem(timeindex=profiles.index)
+
+    buses = {
+        name: Bus(label=name, balanced=bool(arg.balanced))
+        for name, arg in data["bus"].iterrows()
+    }
+    es.add(*buses.values())
+
+    for typ, facade in FACADES:
+        for name, row in data[typ].iterrows():
+            es.add(facade(name, row, buses, profiles))
+
+    es.data, es.profiles = data, profiles
+    return es
+
+
+def _changed(row, other, profiles, other_profiles):
+    if not row.equals(other):
+        return True
+    if "profile" not in row:
+        return False
+    return not np.array_equal(
+        profiles[row["profile"]].values, other_profiles[row["profile"]].values
+    )
+
+
+def _detach(node):
+    for i in list(node.inputs):
+        del i.outputs[node]
+    for o in list(node.outputs):
+        del node.outputs[o]
+
+
+def _patchable(es):
+    """Checks the internals of oemof.network changed by the patch"""
+    buses = [n for n in es.nodes if isinstance(n, Bus)]
+    return (
+        isinstance(getattr(es, "_groups", None), dict)
+        and isinstance(getattr(es, "_first_ungrouped_node_index_", None), int)
+        and all(
+            isinstance(getattr(b.outputs, "data", None), dict) for b in buses
+        )
+    )
+
+
+def patch_energy_system(es, data, profiles):
+    """Changes the `EnergySystem` `es` in place to the one of `data`
+
+    Only the facades whose resolved data or profile differ from the ones of
+    `es` are created again, the others are kept. The nodes are in the same
+    order as in a new `EnergySystem`, s. `create_energy_system`. Returns the
+    number of created facades or None if the buses or the timeindex differ
+    or the internals of oemof.network the patch relies on are missing (s.
+    `_patchable`), i.e. the `EnergySystem` has to be created from scratch.
+    """
+    if not (
+        _patchable(es)
+        and es.profiles.index.equals(profiles.index)
+        and es.data["bus"].equals(data["bus"])
+    ):
+        return None
+
+    nodes = {n.label: n for n in es.nodes}
+    buses = {name: nodes[name] for name in data["bus"].index}
+    order = list(buses)
+    created = 0
+    for typ, facade in FACADES:
+        old, new = es.data[typ], data[typ]
+        for name in old.index.difference(new.index):
+            _detach(nodes.pop(name))
+        for name, row in new.iterrows():
+            order.append(name)
+            if name in old.index:
+                if not _changed(old.loc[name], row, es.profiles, profiles):
+                    continue
+                _detach(nodes.pop(name))
+            nodes[name] = facade(name, row, buses, profiles)
+            created += 1
+
+    es.nodes = [
+        n
+        for name in order
+        for n in [nodes[name]] + list(getattr(nodes[name], "subnodes", []))
+    ]
+    position = {n: i for i, n in enumerate(es.nodes)}
+    for bus in buses.values():
+        bus.outputs.data = {
+            o: bus.outputs.data[o]
+            for o in sorted(bus.outputs.data, key=position.get)
+        }
+
+    # groups are cached by the `EnergySystem`, s. `EnergySystem.groups`
+    es._groups = {}
+    es._first_ungrouped_node_index_ = 0
+    es.data, es.profiles = data, profiles
+    return created
+
+
+def build_model(es, inputs, sensitivity=None, aggregation=None):
+    """Creates the model with the additional constraints of the notebook
+
+    If `sensitivity` is None the CO2-limit of the scenario is applied,
+    otherwise the RE-share constraint with a share of `sensitivity`. The
+    share is the mutable parameter `m.re_share`, s. `sweep`.
+    For an `aggregation` of typical periods, the objective and all energy
+    limits are weighted and the storages are linked across periods.
+    """
+    with metrics.stage("model"):
+        if aggregation is None:
+            weights = None
+            m = Model(es)
+        else:
+            weights = aggregation.weights.values
+            m = Model(es, objective_weighting=weights)
+            tsa.weight_summed_max(m, weights)
+            tsa.link_storages(m, aggregation)
+
+    with metrics.stage("constraints"):
+        add_constraints(m, es, inputs, sensitivity, weights)
+
+    return m
+
+
+def add_constraints(m, es, inputs, sensitivity=None, weights=None):
+    """Adds the CO2-limit or RE-share and the excess limits to the model
+
+    `weights` are the weights of the timesteps (default: 1), s.
+    `build_model`. Constraints of a single variable are applied as its
+    bounds.
+    """
+    data = inputs["data"]
+    co2_limit = inputs["co2_limit"]
+
+    if weights is None:
+        weights = np.ones(len(es.timeindex))
+
+    if sensitivity is None and co2_limit is not None:
+        expressions.integral_limit(
+            m,
+            keyword="emission_factor",
+            limit=co2_limit.loc["BB-electricity", "value"],
+            weights=weights,
+        )
+
+    peak_demand = pd.concat(
+        [n.amount * n.profile for n in es.nodes if isinstance(n, fc.Load)]
+    ).max()
+
+    def _excess_energy_limit(m):
+        lhs = expressions.flow_sum(
+            m, [(es.groups["BB-electricity"], es.groups["el-excess"])], weights
+        )
+        rhs = data["load"]["amount"].sum()
+        return lhs <= rhs * 0.1
+
+    m.excess_energy_limit = po.Constraint(rule=_excess_energy_limit)
+
+    def _excess_power_limit(m, t):
+        lhs = m.flow[es.groups["BB-electricity"], es.groups["el-excess"], t]
+        rhs = peak_demand
+        return lhs <= rhs
+
+    m.excess_power_limit = po.Constraint(m.TIMESTEPS, rule=_excess_power_limit)
+
+    if sensitivity is not None:
+        # all dispatchable are fossil
+        dispatchable = [
+            (i, o)
+            for i, o in m.flows
+            if isinstance(i, fc.Dispatchable)
+            and not isinstance(i, fc.Shortage)
+        ]
+        demand = [(i, o) for i, o in m.flows if isinstance(o, fc.Load)]
+
+        m.re_share = po.Param(initialize=sensitivity, mutable=True)
+
+        def _re_share(m):
+            lhs = expressions.flow_sum(m, dispatchable, weights)
+            rhs = expressions.flow_sum(m, demand, weights)
+            return lhs <= (1 - m.re_share) * rhs
+
+        m.renewable_share = po.Constraint(rule=_re_share)
+
+    # e.g. the excess power limit, s. `lowering`
+    lowering.report(lowering.lower(m))
+
+    # only the hourly prices and the CO2 shadow price, s. `writer`
+    rows = [
+        m.Bus.balance[es.groups[bus], t] for bus in PRICES for t in m.TIMESTEPS
+    ]
+    if hasattr(m, "integral_limit_emission_factor_constraint"):
+        rows.append(m.integral_limit_emission_factor_constraint)
+    solvers.receive_duals(m, rows)
+
+
+def solve(
+    m, solver=None, threads=None, tee=False, backend="file", options=None
+):
+    """Solves the model and extracts the values of the results
+
+    The values are stored in `m.solution` (s. `writer.extract`), the seconds
+    spent in the solver stages in `m.timings`, s. `solvers.solve`. `options`
+    are passed to the solver, s. `solvers.options`.
+    """
+    with metrics.stage("solve") as info:
+        _, timings = solvers.solve(
+            m, solver, backend, threads, tee, options=options
+        )
+        info.update(timings)
+
+    start = time.perf_counter()
+    with metrics.stage("results"):
+        m.solution = writer.extract(m)
+    timings["results"] = time.perf_counter() - start
+
+    m.timings = timings
+    print(
+        "Solved with {} backend: {}.".format(backend, solvers.report(timings))
+    )
+
+    return m
+
+
+def prepare(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    datapath=datapath,
+    wacc=None,
+    typical_periods=None,
+    hours_per_period=24,
+    weather_year=None,
+    inputs=None,
+    reduce=False,
+    reuse=False,
+):
+    """Reads the input and builds the `EnergySystem` of a scenario
+
+    Already read `inputs` of the scenario are used as they are. With a
+    `weather_year` the wind and solar profiles are replaced by the ones of
+    that year, with `reduce` the components are reduced, s.
+    `build_energy_system`. With `reuse` the `EnergySystem` of the previous
+    call with `reuse` in this process is changed in place instead of
+    building a new one, the previous one must not be used anymore. Returns
+    the inputs, the `EnergySystem` and the typical period aggregation (None
+    without `typical_periods`).
+    """
+    with metrics.stage("load"):
+        if inputs is None:
+            inputs = read_input(scenario, datapath)
+
+        if weather_year is not None:
+            inputs = dict(
+                inputs,
+                profiles=swap_weather(inputs["profiles"], weather_year),
+            )
+
+    aggregation = None
+    if typical_periods:
+        with metrics.stage("aggregation"):
+            aggregation = tsa.aggregate(
+                inputs["profiles"],
+                typical_periods,
+                hours_per_period,
+                peaks=list(inputs["data"]["load"]["profile"].unique()),
+            )
+        inputs = dict(inputs, profiles=aggregation.profiles)
+
+    with metrics.stage("facades"):
+        es = build_energy_system(
+            inputs,
+            carrier_scenario,
+            tech_scenario,
+            wacc,
+            reduce=reduce,
+            previous=_built.get("es") if reuse and not reduce else None,
+        )
+    if reuse and not reduce:
+        _built["es"] = es
+
+    return inputs, es, aggregation
+
+
+def _aggregation_name(aggregation):
+    if aggregation is None:
+        return None
+    return "{}x{}".format(
+        len(aggregation.profiles) // aggregation.hours_per_period,
+        aggregation.hours_per_period,
+    )
+
+
+def _runs_path(results_path, wacc, weather_year=None):
+    # runs with changed wacc or weather are kept apart from the base runs
+    if wacc is not None:
+        results_path = os.path.join(results_path, naming.wacc_directory(wacc))
+    if weather_year is not None:
+        results_path = os.path.join(
+            results_path, naming.weather_directory(weather_year)
+        )
+    return results_path
+
+
+def _scenario_path(results_path, name, aggregation):
+    if aggregation is None:
+        return os.path.join(results_path, name)
+    return os.path.join(
+        results_path, "tsa-" + _aggregation_name(aggregation), name
+    )
+
+
+def _postprocess(m, results_path, name, aggregation):
+    """Expands the results of aggregated runs and compares them"""
+    if aggregation is None:
+        return
+
+    scenario_path = _scenario_path(results_path, name, aggregation)
+    tsa.expand_results(m, scenario_path, aggregation)
+
+    full_path = os.path.join(results_path, name)
+    if os.path.exists(os.path.join(full_path, "costs.csv")):
+        error = tsa.compare(full_path, scenario_path)
+        error.to_csv(os.path.join(scenario_path, "aggregation_error.csv"))
+        print("Deviation of {} from full resolution:".format(name))
+        print(error.round(3))
+
+
+def _store(scenario_path, key, results_path, results_format):
+    """Writes the results of a run to the columnar store
+
+    Returns the path of the results, i.e. the store if the CSV files are
+    not kept (`results_format` "parquet").
+    """
+    naming.write(scenario_path, key)
+
+    if results_format == "csv":
+        return scenario_path
+
+    root = os.path.join(results_path, "store")
+    store.ingest(scenario_path, key, root)
+
+    if results_format == "parquet":
+        shutil.rmtree(scenario_path)
+        return root
+
+    return scenario_path
+
+
+def run(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    sensitivity=None,
+    datapath=datapath,
+    results_path=results_path,
+    solver=None,
+    threads=None,
+    wacc=None,
+    typical_periods=None,
+    hours_per_period=24,
+    backend=None,
+    results_format="csv",
+    weather_year=None,
+    instrument=None,
+    options=None,
+    reduce=False,
+    reuse=False,
+):
+    """Runs the complete pipeline for one scenario and returns its path
+
+    With `typical_periods` the profiles are aggregated to this number of
+    typical periods of `hours_per_period` hours. Results of aggregated runs
+    are written to `tsa-<typical_periods>x<hours_per_period>` inside the
+    `results_path`, together with their deviation from the full resolution
+    run if it exists. Runs with a `wacc` are written to `wacc-<wacc>`
+    inside the `results_path`, runs with a `weather_year` (s. `prepare`) to
+    `weather-<weather_year>`.
+
+    `backend` selects the solver interface (default `file`), `options` are
+    passed to the solver, s. `solvers`. With `results_format` "parquet" or
+    "both" the results are written to the columnar store in
+    `results_path/store`, s. `store`.
+
+    With `instrument` "time" the wall and CPU time of every stage and the
+    size of the model are written to `run_metrics.json` in the results of
+    the run, "memory" adds the peak memory per stage, s. `metrics`.
+
+    With `reduce` identical components are merged and dead ones dropped
+    before the model is built, the results are written for all components,
+    s. `reduction`. With `reuse` (and without `reduce`) the `EnergySystem`
+    of the previous run of the process is changed in place, s. `prepare`.
+    """
+    if reduce and typical_periods:
+        raise ValueError("Reduced runs cannot be aggregated.")
+
+    if instrument is not None:
+        metrics.start(memory=instrument == "memory")
+
+    previous = _built.get("es")
+    inputs, es, aggregation = prepare(
+        scenario,
+        carrier_scenario,
+        tech_scenario,
+        datapath,
+        wacc,
+        typical_periods,
+        hours_per_period,
+        weather_year,
+        _inputs.get(scenario),
+        reduce,
+        reuse,
+    )
+    if previous is not None and es is previous:
+        print("Changed the energy system of the previous run in place.")
+
+    name = scenario_name(
+        scenario, carrier_scenario, tech_scenario, sensitivity
+    )
+    runs_path = _runs_path(results_path, wacc, weather_year)
+    scenario_path = _scenario_path(runs_path, name, aggregation)
+
+    m = build_model(es, inputs, sensitivity, aggregation)
+    metrics.record_model(m)
+
+    solve(m, solver, threads, backend=backend or "file", options=options)
+    solution = m.solution
+    if reduce:
+        solution = reduction.expand(solution, es.reduction)
+        es = es.reduction.full
+    if aggregation is None:
+        # only the expansion of aggregated runs needs the model, release it
+        # before the results are written
+        m = None
+        gc.collect()
+
+    with metrics.stage("write"):
+        writer.write(
+            es,
+            solution,
+            scenario_path,
+            co2=sensitivity is None and inputs["co2_limit"] is not None,
+        )
+
+    with metrics.stage("postprocess"):
+        _postprocess(m, runs_path, name, aggregation)
+
+    key = naming.key(
+        scenario,
+        carrier_scenario,
+        tech_scenario,
+        sensitivity,
+        wacc,
+        _aggregation_name(aggregation),
+        weather_year,
+    )
+    metrics.write(
+        scenario_path,
+        key=key,
+        solver=solver or solvers.default_solver(),
+        backend=backend or "file",
+        threads=threads,
+        options=options,
+    )
+    metrics.stop()
+
+    return _store(scenario_path, key, results_path, results_format)
+
+
+def sweep(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    levels=(1,),
+    datapath=datapath,
+    results_path=results_path,
+    solver=None,
+    threads=None,
+    wacc=None,
+    typical_periods=None,
+    hours_per_period=24,
+    backend=None,
+    results_format="csv",
+    weather_year=None,
+    options=None,
+    reuse=False,
+):
+    """Solves a series of RE-share levels on one model
+
+    The model is built once, the RE-share is a mutable parameter that is
+    changed between the solves. With an in-memory `backend` (e.g.
+    `gurobi_persistent`) only the RE-share constraint is updated in the
+    solver and the previous basis is used as warm start. With the `file`
+    backend every level is re-solved from scratch, which still avoids
+    building the model again. Without `backend` the persistent interface is
+    used if it is available. With `reuse` the `EnergySystem` of the
+    previous run of the process is changed in place, s. `prepare`. Returns
+    the paths of all levels.
+    """
+    inputs, es, aggregation = prepare(
+        scenario,
+        carrier_scenario,
+        tech_scenario,
+        datapath,
+        wacc,
+        typical_periods,
+        hours_per_period,
+        weather_year,
+        _inputs.get(scenario),
+        reuse=reuse,
+    )
+
+    m = build_model(es, inputs, levels[0], aggregation)
+
+    solver = solver or solvers.default_solver()
+    if backend is None:
+        if solvers.available(solver, "persistent"):
+            backend = "persistent"
+        else:
+            backend = "file"
+
+    opt = None
+    if backend != "file":
+        opt = solvers.interface(solver, backend, threads, options)
+        print(
+            "Exported model to {} {} in {:.2f} s.".format(
+                backend, solver, solvers.export(opt, m)
+            )
+        )
+
+    runs_path = _runs_path(results_path, wacc, weather_year)
+
+    paths = []
+    for level in levels:
+        m.re_share.set_value(level)
+
+        if opt is None:
+            solve(m, solver, threads, options=options)
+        else:
+            solvers.update(opt, backend, m.renewable_share)
+            _, timings = solvers.solve(m, solver, backend, tee=False, opt=opt)
+            m.solution = writer.extract(m)
+            print(
+                "Solved RE-share {}: {}.".format(
+                    level, solvers.report(timings)
+                )
+            )
+
+        name = scenario_name(scenario, carrier_scenario, tech_scenario, level)
+        scenario_path = _scenario_path(runs_path, name, aggregation)
+
+        writer.write(es, m.solution, scenario_path)
+
+        _postprocess(m, runs_path, name, aggregation)
+
+        paths.append(
+            _store(
+                scenario_path,
+                naming.key(
+                    scenario,
+                    carrier_scenario,
+                    tech_scenario,
+                    level,
+                    wacc,
+                    _aggregation_name(aggregation),
+                    weather_year,
+                ),
+                results_path,
+                results_format,
+            )
+        )
+
+    return paths
+
+
+def weather_spread(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    sensitivity=None,
+    weather_years=weather.YEARS,
+    results_path=results_path,
+    wacc=None,
+    aggregation=None,
+):
+    """Writes the capacities and LCOE of all weather years side by side
+
+    The spread is the difference of the maximum and minimum over the years,
+    the table is written to `weather-spread/<name>.csv` in the runs path
+    and returned. `aggregation` is the name of aggregated runs, e.g. 12x24.
+    """
+    name = scenario_name(
+        scenario, carrier_scenario, tech_scenario, sensitivity
+    )
+    runs_path = _runs_path(results_path, wacc)
+
+    years = {}
+    for year in weather_years:
+        path = _runs_path(runs_path, None, year)
+        if aggregation is not None:
+            path = os.path.join(path, "tsa-" + aggregation)
+        kpis = kpi.kpis(os.path.join(path, name))
+        years[year] = pd.Series(dict(kpis["capacities"], LCOE=kpis["LCOE"]))
+
+    df = pd.DataFrame(years)
+    df["mean"] = df[list(years)].mean(axis=1)
+    df["min"] = df[list(years)].min(axis=1)
+    df["max"] = df[list(years)].max(axis=1)
+    df["spread"] = df["max"] - df["min"]
+
+    path = os.path.join(runs_path, "weather-spread")
+    os.makedirs(path, exist_ok=True)
+    df.to_csv(os.path.join(path, name + ".csv"))
+
+    return df
+
+
+def _init(threads, inputs):
+    if threads is not None:
+        for variable in THREAD_VARIABLES:
+            os.environ[variable] = str(threads)
+    _inputs.update(inputs)
+
+
+def _run(task):
+    task = dict(task)
+    if "levels" in task:
+        return ", ".join(sorted(set(sweep(**task))))
+    return run(**task)
+
+
+def tasks(
+    scenarios,
+    sensitivities,
+    carrier_scenarios=None,
+    tech_scenarios=None,
+    base=True,
+):
+    """Creates the keyword arguments of `run` for all combinations
+
+    Without explicit carrier and tech scenarios the combinations of
+    `SCENARIOS` are used.
+    """
+    defaults = {s: (c, t) for s, c, t in SCENARIOS}
+    levels = ([None] if base else []) + list(sensitivities)
+
+    for scenario in scenarios:
+        carriers = carrier_scenarios or [defaults.get(scenario, ("base",))[0]]
+        techs = tech_scenarios or [
+            defaults.get(scenario, (None, "reference"))[1]
+        ]
+        for carrier, tech, level in itertools.product(carriers, techs, levels):
+            yield {
+                "scenario": scenario,
+                "carrier_scenario": carrier,
+                "tech_scenario": tech,
+                "sensitivity": level,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=[s for s, _, _ in SCENARIOS],
+        help="Scenarios (workbooks without .xls or deltas) to run.",
+    )
+    parser.add_argument(
+        "--sensitivities",
+        nargs="*",
+        type=float,
+        default=[1],
+        help="RE-shares for the sensitivity runs, e.g. 0.95 for 95%%.",
+    )
+    parser.add_argument(
+        "--skip-base",
+        action="store_true",
+        help="Only run the sensitivities, not the CO2-limited base run.",
+    )
+    parser.add_argument(
+        "--sweep",
+        nargs=3,
+        type=float,
+        metavar=("START", "STOP", "STEP"),
+        help="Solve the RE-shares START to STOP (incl.) on one model per "
+        "scenario, e.g. 0.5 1 0.01.",
+    )
+    parser.add_argument("--carrier-scenarios", nargs="+")
+    parser.add_argument("--tech-scenarios", nargs="+")
+    parser.add_argument(
+        "--wacc",
+        type=float,
+        help="Replaces the wacc of all technologies, e.g. 0.04 for 4%%.",
+    )
+    parser.add_argument(
+        "--weather-years",
+        nargs="+",
+        type=int,
+        help="Solve every run with the wind and solar profiles of these "
+        "years, e.g. {}.".format(" ".join(map(str, weather.YEARS))),
+    )
+    parser.add_argument(
+        "--typical-periods",
+        type=int,
+        help="Aggregate the profiles to this number of typical periods.",
+    )
+    parser.add_argument(
+        "--hours-per-period",
+        type=int,
+        default=24,
+        help="Length of the typical periods, e.g. 24 (days) or 168 (weeks).",
+    )
+    parser.add_argument(
+        "--reduce",
+        action="store_true",
+        help="Merge identical and drop dead components before the model is "
+        "built, the results contain all components.",
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="Change the energy system of the previous run of a worker in "
+        "place instead of building a new one (not with --reduce).",
+    )
+    parser.add_argument("--datapath", default=datapath)
+    parser.add_argument("--results-path", default=results_path)
+    parser.add_argument(
+        "--profile",
+        choices=list(solvers.PROFILES),
+        default="default",
+        help="Solver, backend and tuning, s. solvers.PROFILES. The options "
+        "below replace the ones of the profile.",
+    )
+    parser.add_argument(
+        "--solver", help="Default: gurobi if available else cbc."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=solvers.BACKENDS,
+        help="Solver interface, 'persistent' and 'appsi' solve in memory "
+        "without LP files. Default: file (persistent for --sweep).",
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=["barrier", "dual"],
+        help="LP algorithm, default: the one chosen by the solver.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="Primal and dual feasibility tolerance of the solver.",
+    )
+    parser.add_argument("--time-limit", type=float, help="Seconds per solve.")
+    parser.add_argument(
+        "--results-format",
+        choices=["csv", "parquet", "both"],
+        default="csv",
+        help="Write CSV directories per run, the columnar store in "
+        "<results-path>/store or both.",
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=["time", "memory"],
+        help="Write the time (and peak memory) of every stage and the size "
+        "of the model to run_metrics.json.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of models solved in parallel.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Solver threads per process. Default: cores / processes.",
+    )
+    args = parser.parse_args()
+
+    settings = solvers.profile(
+        args.profile,
+        solver=args.solver,
+        backend=args.backend,
+        threads=args.threads,
+        algorithm=args.algorithm,
+        tolerance=args.tolerance,
+        time_limit=args.time_limit,
+    )
+    threads = settings["threads"] or max(1, os.cpu_count() // args.processes)
+    # threads are passed on their own, s. `_init`
+    options = solvers.options(**dict(settings, threads=None))
+
+    todo = list(
+        tasks(
+            args.scenarios,
+            [] if args.sweep else args.sensitivities,
+            args.carrier_scenarios,
+            args.tech_scenarios,
+            base=not args.skip_base,
+        )
+    )
+    if args.sweep:
+        start, stop, step = args.sweep
+        levels = [
+            round(level, 6)
+            for level in np.arange(start, stop + step / 2, step)
+        ]
+        for task in tasks(
+            args.scenarios,
+            [levels[0]],
+            args.carrier_scenarios,
+            args.tech_scenarios,
+            base=False,
+        ):
+            del task["sensitivity"]
+            task["levels"] = levels
+            todo.append(task)
+
+    inputs = {}
+    if args.weather_years:
+        # read once, the workers only swap the weather profiles
+        inputs = {
+            s: read_input(s, args.datapath)
+            for s in set(task["scenario"] for task in todo)
+        }
+        todo = [
+            dict(task, weather_year=year)
+            for task in todo
+            for year in args.weather_years
+        ]
+
+    for task in todo:
+        if args.metrics and "levels" not in task:
+            task["instrument"] = args.metrics
+        if args.reduce and "levels" not in task:
+            task["reduce"] = True
+        if args.reuse:
+            task["reuse"] = True
+        task.update(
+            {
+                "datapath": args.datapath,
+                "results_path": args.results_path,
+                "solver": settings["solver"],
+                "backend": settings["backend"],
+                "options": options,
+                "results_format": args.results_format,
+                "threads": threads,
+                "wacc": args.wacc,
+                "typical_periods": args.typical_periods,
+                "hours_per_period": args.hours_per_period,
+            }
+        )
+
+    with ProcessPoolExecutor(
+        max_workers=min(args.processes, len(todo)) or 1,
+        initializer=_init,
+        initargs=(threads, inputs),
+    ) as pool:
+        futures = {pool.submit(_run, task): task for task in todo}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                print(
+                    "Optimization done. Results are in {}.".format(
+                        future.result()
+                    )
+                )
+            except Exception as e:
+                print(
+                    "Optimization of {} failed: {}".format(
+                        scenario_name(
+                            task["scenario"],
+                            task["carrier_scenario"],
+                            task["tech_scenario"],
+                            task.get("sensitivity"),
+                        ),
+                        e,
+                    )
+                )
+
+    if args.weather_years and args.results_format != "parquet":
+        aggregation = None
+        if args.typical_periods:
+            aggregation = "{}x{}".format(
+                args.typical_periods, args.hours_per_period
+            )
+        for task in todo:
+            if task["weather_year"] != args.weather_years[0]:
+                continue
+            for level in task.get("levels", [task.get("sensitivity")]):
+                name = scenario_name(
+                    task["scenario"],
+                    task["carrier_scenario"],
+                    task["tech_scenario"],
+                    level,
+                )
+                try:
+                    spread = weather_spread(
+                        task["scenario"],
+                        task["carrier_scenario"],
+                        task["tech_scenario"],
+                        level,
+                        args.weather_years,
+                        args.results_path,
+                        args.wacc,
+                        aggregation,
+                    )
+                except OSError as e:
+                    print("No weather spread of {}: {}".format(name, e))
+                    continue
+                print("Spread of {} over the weather years:".format(name))
+                print(spread.round(3))
+
+
+if __name__ == "__main__":
+    main()
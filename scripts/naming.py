@@ -0,0 +1,149 @@
+"""
+Names of the scenario runs and their results directories.
+
+A run is identified by its key: scenario, carrier scenario, tech scenario,
+RE-share sensitivity, wacc, weather year and typical period aggregation.
+`scenario_name` builds the name of the results directory from the key,
+`parse` restores the key from a results directory, i.e.
+
+    <results_path>[/wacc-<wacc>][/weather-<year>][/tsa-<periods>x<hours>]/
+        <name>
+
+The directories `wacc` and `wacc_low` of the paper runs are known as well.
+Every run written by `scripts/model.py` also stores its key in `run.json`,
+which takes precedence over the directory layout, s. `read`.
+"""
+
+import json
+import os
+
+# combinations used for the paper, s. model.ipynb
+SCENARIOS = [
+    ("SQ", "base", "reference"),
+    ("REF", "base", "reference"),
+    ("HD", "base", "reference"),
+    ("RB", "base", "reference"),
+    ("NPHS", "base", "reference"),
+    ("EVUC", "base", "reference"),
+    ("LOP", "lop", "reference"),
+    ("LRC", "base", "longterm"),
+    ("MRC", "base", "mediumterm"),
+    ("HBC", "base", "hohmeyer"),
+]
+
+# wacc of the sensitivity directories used for the paper
+WACC_DIRECTORIES = {"wacc": 0.1, "wacc_low": 0.04}
+
+KEYS = [
+    "scenario",
+    "carrier_scenario",
+    "tech_scenario",
+    "sensitivity",
+    "wacc",
+    "weather_year",
+    "aggregation",
+]
+
+
+def scenario_name(scenario, carrier_scenario, tech_scenario, sensitivity=None):
+    """Name of the results directory of a run
+
+    Runs with the combination used for the paper are named after the
+    scenario only, other combinations get the carrier and tech scenario
+    appended. RE-share sensitivities are suffixed with the share in %.
+    """
+    if (scenario, carrier_scenario, tech_scenario) in SCENARIOS:
+        name = scenario
+    else:
+        name = "-".join([scenario, carrier_scenario, tech_scenario])
+    if sensitivity is not None:
+        name += "-" + str(int(round(sensitivity * 100)))
+    return name
+
+
+def key(
+    scenario,
+    carrier_scenario="base",
+    tech_scenario="reference",
+    sensitivity=None,
+    wacc=None,
+    aggregation=None,
+    weather_year=None,
+):
+    """Returns the key of a run as dictionary"""
+    return {
+        "scenario": scenario,
+        "carrier_scenario": carrier_scenario,
+        "tech_scenario": tech_scenario,
+        "sensitivity": sensitivity,
+        "wacc": wacc,
+        "weather_year": weather_year,
+        "aggregation": aggregation,
+    }
+
+
+def parse(scenario_path, results_path):
+    """Returns the key of the run in `scenario_path`, s. `key`"""
+    parts = os.path.relpath(scenario_path, results_path).split(os.sep)
+    name = parts.pop()
+
+    wacc = None
+    weather_year = None
+    aggregation = None
+    for part in parts:
+        if part in WACC_DIRECTORIES:
+            wacc = WACC_DIRECTORIES[part]
+        elif part.startswith("wacc-"):
+            wacc = float(part.replace("wacc-", "", 1))
+        elif part.startswith("weather-"):
+            weather_year = int(part.replace("weather-", "", 1))
+        elif part.startswith("tsa-"):
+            aggregation = part.replace("tsa-", "", 1)
+
+    names = name.split("-")
+    sensitivity = None
+    if len(names) > 1 and names[-1].isdigit():
+        sensitivity = int(names.pop()) / 100
+
+    defaults = {s: (c, t) for s, c, t in SCENARIOS}
+    if len(names) == 3:
+        scenario, carrier_scenario, tech_scenario = names
+    else:
+        scenario = "-".join(names)
+        carrier_scenario, tech_scenario = defaults.get(
+            scenario, ("base", "reference")
+        )
+
+    return key(
+        scenario,
+        carrier_scenario,
+        tech_scenario,
+        sensitivity,
+        wacc,
+        aggregation,
+        weather_year,
+    )
+
+
+def wacc_directory(wacc):
+    return "wacc-{:g}".format(wacc)
+
+
+def weather_directory(weather_year):
+    return "weather-{}".format(weather_year)
+
+
+def write(scenario_path, key):
+    """Stores the key of a run in its directory"""
+    with open(os.path.join(scenario_path, "run.json"), "w") as f:
+        json.dump(key, f, indent=2)
+
+
+def read(scenario_path, results_path):
+    """Returns the key of a run from its `run.json` or its directory"""
+    try:
+        with open(os.path.join(scenario_path, "run.json")) as f:
+            # runs written before the weather year was part of the key
+            return dict(key(None), **json.load(f))
+    except OSError:
+        return parse(scenario_path, results_path)
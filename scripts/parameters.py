@@ -0,0 +1,139 @@
+"""
+Resolution of technology and carrier parameters for the component sheets.
+
+The technology and carrier data of one (carrier_scenario, tech_scenario,
+wacc) combination is reduced to one table indexed by (carrier, tech) that
+holds all derived cost parameters. Every component sheet is then joined
+against this table once, so all parameters are computed column-wise.
+
+The derived columns are:
+
+* efficiency: efficiency of the sheet, technology efficiency if not set
+* annuity: annuity of the capex in $/MW
+* capacity_cost: annuity incl. fixed O&M in $/MW (expandable units only)
+* storage_capacity_cost: annuity of the storage capex in $/MWh
+* marginal_cost: marginal cost of the sheet if set, otherwise fuel cost
+  divided by the technology efficiency plus variable O&M
+* carrier_cost, vom: fuel cost and variable O&M
+* emission_factor: emission factor of the carrier per unit of output
+* summed_max: availability factor times 8760 hours
+"""
+
+import numpy as np
+import pandas as pd
+
+# resolved parameter tables per (carrier_scenario, tech_scenario, wacc)
+_parameters = {}
+
+
+def annuity(capex, n, wacc):
+    """Vectorized version of `oemof.tools.economics.annuity`"""
+    return capex * (wacc * (1 + wacc) ** n) / ((1 + wacc) ** n - 1)
+
+
+def _fingerprint(df):
+    return int(pd.util.hash_pandas_object(df, index=True).sum())
+
+
+def parameters(
+    technology, carrier, carrier_scenario, tech_scenario, wacc=None
+):
+    """Returns the derived parameters indexed by (carrier, tech)
+
+    If `wacc` is given it replaces the wacc of all technologies.
+    """
+    key = (
+        carrier_scenario,
+        tech_scenario,
+        wacc,
+        _fingerprint(technology),
+        _fingerprint(carrier),
+    )
+    if key in _parameters:
+        return _parameters[key]
+
+    tech = technology.xs(tech_scenario, level=2)
+    tech = tech[~tech.index.duplicated(keep="first")]
+    carr = carrier.xs(carrier_scenario, level=1)
+
+    if wacc is not None:
+        rate = pd.Series(wacc, index=tech.index)
+    else:
+        rate = tech["wacc"]
+
+    df = pd.DataFrame(index=tech.index)
+    df["efficiency"] = tech["efficiency"]
+    df["annuity"] = annuity(tech["capex"], tech["lifetime"], rate) * 1000
+    df["capacity_cost"] = df["annuity"] * (1 + tech["fom"])
+    df["storage_capacity_cost"] = (
+        annuity(tech["storage_capex"], tech["lifetime"], rate) * 1000
+    )
+    df["vom"] = tech["vom"]
+    df["avf"] = tech["avf"]
+
+    carrier_ = df.index.get_level_values(0)
+    df["carrier_cost"] = carr["cost"].reindex(carrier_).values
+    df["carrier_emission_factor"] = (
+        carr["emission_factor"].reindex(carrier_).values
+    )
+    df["marginal_cost"] = df["carrier_cost"] / df["efficiency"] + df["vom"]
+    df.index.names = ["carrier", "tech"]
+
+    _parameters[key] = df
+
+    return df
+
+
+def resolve(
+    data, technology, carrier, carrier_scenario, tech_scenario, wacc=None
+):
+    """Returns copies of the component sheets with the derived parameters
+
+    Sheets without `carrier` and `tech` columns are returned unchanged.
+    Carriers which are not part of the carrier data (e.g. `electricity`)
+    and technologies without data get NaN parameters.
+    """
+    params = parameters(
+        technology, carrier, carrier_scenario, tech_scenario, wacc
+    )
+
+    resolved = {}
+    for sheet, df in data.items():
+        if not {"carrier", "tech"}.issubset(df.columns):
+            resolved[sheet] = df
+            continue
+
+        p = params.reindex(pd.MultiIndex.from_arrays([df.carrier, df.tech]))
+        p.index = df.index
+
+        df = df.copy()
+
+        if "efficiency" in df.columns:
+            df["efficiency"] = df["efficiency"].fillna(p["efficiency"])
+            efficiency = df["efficiency"]
+        else:
+            efficiency = p["efficiency"]
+
+        if "expandable" in df.columns:
+            expandable = df["expandable"].fillna(False).astype(bool)
+        else:
+            expandable = pd.Series(False, index=df.index)
+
+        if "marginal_cost" in df.columns:
+            df["marginal_cost"] = df["marginal_cost"].fillna(
+                p["marginal_cost"]
+            )
+        else:
+            df["marginal_cost"] = p["marginal_cost"]
+
+        df["annuity"] = p["annuity"]
+        df["capacity_cost"] = p["capacity_cost"].where(expandable, np.nan)
+        df["storage_capacity_cost"] = p["storage_capacity_cost"]
+        df["carrier_cost"] = p["carrier_cost"]
+        df["vom"] = p["vom"]
+        df["emission_factor"] = p["carrier_emission_factor"] / efficiency
+        df["summed_max"] = p["avf"] * 8760
+
+        resolved[sheet] = df
+
+    return resolved
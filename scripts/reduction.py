@@ -0,0 +1,203 @@
+"""
+Reduction of the components of a scenario before the model is built.
+
+Volatile and dispatchable components that differ only in their capacities,
+labels, carrier and tech (same bus, costs, emissions and profile values) are
+merged into one component with the summed capacities, named after the first
+of them. Expandable components without a potential (unlimited) or with a
+minimum investment are not merged. Components that cannot have a flow (loads
+with an amount of zero, components with a capacity of zero that are not
+expandable) are dropped:
+
+    data, r = reduction.reduce(data, profiles)
+
+`expand` maps the solution of the reduced model back to the components of
+the full `EnergySystem`. Merged flows are split by the capacity of each
+component, the investment of expandable components by their potential for
+additional capacity. The flows of dropped components are zero. The results
+are the same as the ones of the full model, s. `model.build_energy_system`.
+"""
+
+import collections
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import writer
+
+# types of the components that are merged
+MERGED = ["volatile", "dispatchable"]
+
+# columns that may differ between merged components
+DIFFERING = ["capacity", "capacity_potential", "carrier", "tech", "profile"]
+
+Reduction = collections.namedtuple("Reduction", ["groups", "dead", "full"])
+Reduction.__doc__ = """Result of `reduce`
+
+groups: merged components per kept label with their capacity and potential
+    for additional capacity, {label: {label: (capacity, additional)}}
+dead: labels of the dropped components
+full: `EnergySystem` of all components, s. `model.build_energy_system`
+"""
+
+
+def _dead(typ, c):
+    if typ == "load":
+        return c["amount"] == 0
+    if typ in ["volatile", "dispatchable", "conversion"]:
+        return not c.get("expandable", False) and c["capacity"] == 0
+    if typ == "storage":
+        return (
+            not c["expandable"]
+            and c["capacity"] == 0
+            and c["storage_capacity"] == 0
+        )
+    return False
+
+
+def _key(c, profiles):
+    """Components with the same key are merged"""
+    key = tuple(
+        (k, None if v != v else v) for k, v in c.items() if k not in DIFFERING
+    )
+    if "profile" in c:
+        key += (hashlib.sha1(profiles[c["profile"]].values).hexdigest(),)
+    return key
+
+
+def _additional(c):
+    if not c.get("expandable", False):
+        return 0
+    return c["capacity_potential"] - c["capacity"]
+
+
+def reduce(data, profiles):
+    """Merges identical and drops dead components of the resolved `data`
+
+    Returns the reduced data and the `Reduction` (without the full
+    `EnergySystem`).
+    """
+    data = dict(data)
+    groups = {}
+    dead = set()
+
+    for typ, df in data.items():
+        if df.empty:
+            continue
+        drop = [name for name, c in df.iterrows() if _dead(typ, c.to_dict())]
+        dead.update(drop)
+        df = df.drop(drop)
+
+        if typ in MERGED:
+            merged = collections.OrderedDict()
+            for name, c in df.sort_index().iterrows():
+                c = c.to_dict()
+                # the minimum investment is not split, unlimited investment
+                # (no potential) cannot be split by the potential
+                if c.get("expandable") and (
+                    c.get("capacity_minimum", 0)
+                    or pd.isna(c.get("capacity_potential"))
+                ):
+                    merged[name] = [name]
+                    continue
+                merged.setdefault(_key(c, profiles), []).append(name)
+
+            for names in merged.values():
+                if len(names) == 1:
+                    continue
+                first = names[0]
+                groups[first] = {
+                    n: (df.at[n, "capacity"], _additional(df.loc[n]))
+                    for n in names
+                }
+                for column in ["capacity", "capacity_potential"]:
+                    # NaN (unlimited) if any of them is NaN
+                    df.at[first, column] = df.loc[names, column].sum(
+                        min_count=len(names)
+                    )
+                df = df.drop(names[1:])
+
+        data[typ] = df
+
+    return data, Reduction(groups, dead, None)
+
+
+def _shares(reduction, solution, nodes):
+    """Shares of the flows and investments of the merged components"""
+    flow, invest = {}, {}
+    for first, members in reduction.groups.items():
+        invested = {
+            k: v
+            for k, v in solution.invest.items()
+            if nodes.get(first) in k and v is not None
+        }
+        total = sum(invested.values())
+
+        additional = sum(a for _, a in members.values())
+        capacity = {}
+        for label, (existing, a) in members.items():
+            invest[label] = a / additional if additional else 0
+            capacity[label] = existing + invest[label] * total
+
+        summed = sum(capacity.values())
+        for label in members:
+            flow[label] = capacity[label] / summed if summed else 0
+    return flow, invest
+
+
+def expand(solution, reduction):
+    """Solution of the reduced model for the full `EnergySystem`
+
+    The returned `writer.Solution` is keyed by the nodes of
+    `reduction.full`, s. `writer.write`.
+    """
+    nodes = {}
+    for key in list(solution.flows) + list(solution.invest):
+        nodes.update((str(n), n) for n in key if n is not None)
+    nodes.update((str(n), n) for n in solution.content)
+
+    kept = {
+        label: first
+        for first, members in reduction.groups.items()
+        for label in members
+    }
+    flow_share, invest_share = _shares(reduction, solution, nodes)
+
+    def reduced(node):
+        return nodes[kept.get(node.label, node.label)]
+
+    def share(i, o, shares):
+        return shares.get(i.label, shares.get(o.label, 1))
+
+    n = len(reduction.full.timeindex)
+    flows, invest = {}, {}
+    for (i, o), f in reduction.full.flows().items():
+        if i.label in reduction.dead or o.label in reduction.dead:
+            flows[i, o] = np.zeros(n)
+            continue
+        key = (reduced(i), reduced(o))
+        flows[i, o] = solution.flows[key] * share(i, o, flow_share)
+        if f.investment is not None:
+            value = solution.invest[key]
+            invest[i, o] = value * share(i, o, invest_share)
+
+    content = {}
+    for node in reduction.full.nodes:
+        if node.label in reduction.dead:
+            if hasattr(node, "storage_capacity"):
+                content[node] = np.zeros(n)
+        elif node.label in nodes and nodes[node.label] in solution.content:
+            content[node] = solution.content[nodes[node.label]]
+            if (nodes[node.label], None) in solution.invest:
+                invest[node, None] = solution.invest[nodes[node.label], None]
+
+    duals = None
+    if solution.duals is not None:
+        duals = {
+            node: solution.duals[nodes[node.label]]
+            for node in reduction.full.nodes
+            if node.label in nodes and nodes[node.label] in solution.duals
+        }
+
+    return writer.Solution(flows, invest, content, duals, solution.costs)
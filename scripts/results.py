@@ -1,14 +1,44 @@
+"""
+Figures and tables of the paper from the results of all runs.
+
+Every artifact (s. `ARTIFACTS`) declares the files it writes, the data it is
+rendered from and its render function. An artifact is only rendered again if
+one of its files is missing or if its data, its render function or the
+values and functions of this module used by it (e.g. `scenarios`,
+`color_dict`) changed since the last build, the fingerprints are kept in
+`visualization/.build.json`. Stale artifacts are rendered in parallel
+processes with the non-interactive Agg backend. Run from the repository
+root, e.g.:
+
+    python scripts/results.py
+    python scripts/results.py energy lcoe --force
+"""
+
+import argparse
+import collections
+import hashlib
+import inspect
+import json
 import os
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
+import pandas as pd
+
+import matplotlib
 
-# from cydets.algorithm import detect_cycles
+matplotlib.use("Agg")
 
-from oemof.tools.economics import annuity
 import matplotlib.pyplot as plt
 from matplotlib import colors
 import seaborn as sns
 
+import heatmap
+import kpi
+
+# increase if the artifacts change beyond the code of this module (e.g. a
+# newer matplotlib), invalidates all fingerprints
+VERSION = 1
 
 color = {
     "hfo-msce": "lightgray",
@@ -32,24 +62,12 @@ color = {
     "excess": "crimson",
     "fossil": "lightgray",
 }
-color_dict = {
-    name: colors.to_hex(color) for name, color in color.items()
-}
+color_dict = {name: colors.to_hex(color) for name, color in color.items()}
 
-path = os.path.join(
-    os.path.expanduser("~"), "oemof-results", "barbados"
-)
+path = os.path.join(os.path.expanduser("~"), "oemof-results", "barbados")
 
-renewables = ["bagasse-st", "wind-onshore", "solar-pv", "waste-ocgt"]
-phs_storages = [
-    "hydro-phs",
-]
-storages = ["lithium-battery", "hydro-phs"]
+visualization = "visualization"
 
-conventionals = [
-    "hfo-lsce",
-    "hfo-msce",
-]
 scenarios = ["SQ"] + ["SQ-" + name for name in ["100"]]
 scenarios += ["HD"] + ["HD-" + name for name in ["100"]]
 scenarios += ["RB"] + ["RB-" + name for name in ["100"]]
@@ -61,522 +79,581 @@ scenarios += ["LRC"] + ["LRC-" + name for name in ["100"]]
 scenarios += ["MRC"] + ["MRC-" + name for name in ["100"]]
 scenarios += ["HBC"] + ["HBC-" + name for name in ["100"]]
 
+# scenarios of the heatmap
+scenario1 = "REF"
+scenario2 = "REF-100"
+
 bus = "BB-electricity"
-all_capacities = pd.DataFrame()
-co2 = pd.DataFrame()
-energy = pd.DataFrame()
 
-for dir in os.listdir(path):
-    capacities = pd.read_csv(
-        os.path.join(path, dir, "capacities.csv"), index_col=0
+
+def _output(name):
+    return os.path.join(visualization, name)
+
+
+def re_share_table(re_share):
+    re_share.to_latex(
+        caption="Renewable energy share in different scenarios.",
+        label="tab:re_share",
+        float_format="{:0.2f}".format,
+        buf=_output("tables/re_share.tex"),
     )
-    capacities.set_index("to", append=True, inplace=True)
-    capacities = (
-        capacities.groupby(["to", "carrier", "tech"])
-        .sum()
-        .unstack("to")
+
+
+def installed_capacities(capacities):
+    order = [
+        "hfo-lsce",
+        "hfo-msce",
+        "bagasse-st",
+        "waste-ocgt",
+        "pv-utility",
+        "pv-distributed",
+        "wind-onshore",
+        "hydro-phs",
+        "lithium-battery",
+    ]
+
+    _df = capacities.copy()
+    _df.columns = [c.replace("-base-", "-") for c in _df.columns]
+    select = [i for i in scenarios if "" in i]
+    _df.index = [i.replace("solar-", "") for i in _df.index]
+    _df = (
+        _df[select]
+        .loc[_df.index.intersection(order)]
+        .reindex(order)
+        .stack()
+        .reset_index()
     )
-    capacities.index = ["-".join(i) for i in capacities.index]
+    _df.columns = ["Tech", "Scenario", "Capacity"]
 
-    temp = pd.read_csv(
-        os.path.join(path, dir, bus + ".csv"), index_col=0
+    palette = list(reversed([plt.cm.tab20(i) for i in range(20)]))
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax = sns.barplot(
+        x="Tech", y="Capacity", hue="Scenario", palette=palette, data=_df
     )
-    temp = temp.sum()
-    temp.name = dir
-    energy = pd.concat([energy, temp], axis=1, sort=False)
-
-    capacities.columns = capacities.columns.droplevel(0)
-    capacities.columns = [dir]
-    all_capacities = pd.concat(
-        [all_capacities, capacities], axis=1, sort=False
+    ax.set_xticklabels(labels=_df["Tech"].unique(), rotation=45)
+    ax.set_xlabel("")
+
+    ax.legend()
+    handles, labels = ax.get_legend_handles_labels()
+    lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
+    ax.set_ylabel("Installed capacity in MW")
+    ax.grid(linestyle="--", lw=0.2)
+
+    lgd = ax.legend(
+        list(lgd.keys()),
+        list(lgd.values()),
+        loc="lower left",
+        bbox_to_anchor=(0.1, -0.75),
+        shadow=False,
+        frameon=False,
+        ncol=4,
+    )
+    plt.savefig(
+        _output("figures/installed_capacities.pdf"),
+        bbox_extra_artists=(lgd,),
+        bbox_inches="tight",
+    )
+    _df.set_index(["Tech", "Scenario"]).unstack().T.droplevel(0).to_latex(
+        caption="Installed capacities in MW.",
+        label="tab:installed_capacities",
+        float_format="{:0.2f}".format,
+        buf=_output("tables/installed_capacities.tex"),
     )
 
-    capacities.groupby(level=[0]).sum()
-
-all_capacities = all_capacities.sort_index(axis=1)
-re_share = (
-    1
-    - energy.loc[conventionals].sum()
-    / energy.loc[[l for l in energy.index if "load" in l]].sum()
-).sort_index()
-
-re_share.to_latex(
-    caption="Renewable energy share in different scenarios.",
-    label="tab:re_share",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/re_share.tex",
-)
-# -capacity plot -----------------------------------------------------------
-_df = all_capacities.copy()
-order = [
-    "hfo-lsce",
-    "hfo-msce",
-    "bagasse-st",
-    "waste-ocgt",
-    "pv-utility",
-    "pv-distributed",
-    "wind-onshore",
-    "hydro-phs",
-    "lithium-battery",
-]
-
-_df.columns = [c.replace("-base-", "-") for c in _df.columns]
-re_share.index = [c.replace("-base-", "-") for c in re_share.index]
-select = [i for i in scenarios if "" in i]
-_df.index = [i.replace("solar-", "") for i in _df.index]
-_df = (
-    _df[select]
-    .loc[_df.index.intersection(order)]
-    .reindex(order)
-    .stack()
-    .reset_index()
-)
-# ax = (_df[select].loc[_df.index.intersection(order)].reindex(order)).T.plot(
-_df.columns = ["Tech", "Scenario", "Capacity"]
-
-
-colors = iter([plt.cm.tab20(i) for i in range(20)])
-colors = [i for i in reversed([i for i in colors])]
-fig, ax = plt.subplots(figsize=(8, 4))
-ax = sns.barplot(
-x="Tech", y="Capacity", hue="Scenario", palette=colors, data=_df
-)
-ax.set_xticklabels(labels=_df["Tech"].unique(), rotation="45")
-ax.set_xlabel("")
-#     kind="bar",
-#     stacked=False,
-#     #cmap="Paired",
-#     color=[color_dict.get(c) for c in _df.loc[order].index],
-#     rot=90,
-# )
-
-ax.legend()
-# ax.set_ylim(-60, 70)
-handles, labels = ax.get_legend_handles_labels()
-lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
-ax.set_ylabel("Installed capacity in MW")
-ax.grid(linestyle="--", lw=0.2)
-
-# ax2 = ax.twinx()
-# re_share.reindex(select).multiply(100).plot(
-#    linestyle="", marker="D", color="green", label="RE-share", ax=ax2
-# )
-##ax2.set_ylim(0, 100)
-# ax2.set_ylabel("RE-share in %")
-# plt.xticks(rotation=0)
-# lines2, labels2 = ax2.get_legend_handles_labels()
-lgd = ax.legend(
-    list(lgd.keys()),
-    list(lgd.values()),
-    loc="lower left",
-    bbox_to_anchor=(0.1, -0.75),
-    shadow=False,
-    frameon=False,
-    ncol=4,
-)
-plt.savefig(
-    "visualization/figures/installed_capacities.pdf".format(""),
-    bbox_extra_artists=(lgd,),
-    bbox_inches="tight",
-)
-_df.set_index(["Tech", "Scenario"]).unstack().T.droplevel(0).to_latex(
-    caption="Installed capacities in MW.",
-    label="tab:installed_capacities",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/installed_capacities.tex",
-)
-
-
-all_capacities = pd.DataFrame()
-storage_capacity = pd.DataFrame()
-energy = pd.DataFrame()
-peak_demand = {}
-objective = pd.DataFrame()
-investment_cost = pd.DataFrame()
-for dir in os.listdir(path):
-    filling_levels = pd.read_csv(
-        os.path.join(path, dir, "filling_levels.csv"),
-        index_col=0,
-        parse_dates=True,
+
+def investment_cost(investment_cost):
+    ax = (
+        investment_cost[scenarios]
+        .T.divide(1e6)
+        .plot(
+            kind="bar",
+            stacked=True,
+            color=[
+                color_dict.get(i.replace("-cos", ""))
+                for i in investment_cost[scenarios].index
+            ],
+        )
+    )
+    ax.legend()
+    handles, labels = ax.get_legend_handles_labels()
+    lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
+    ax.set_ylabel("Investment cost in Mio. BBD")
+    ax.grid(linestyle="--", lw=0.2)
+    lgd = ax.legend(
+        list(lgd.keys()),
+        list(lgd.values()),
+        loc="lower left",
+        bbox_to_anchor=(-0.05, -0.55),
+        ncol=3,
+        borderaxespad=0,
+        frameon=False,
     )
-    capacities = pd.read_csv(
-        os.path.join(path, dir, "capacities.csv"), index_col=0
+    plt.savefig(
+        _output("figures/investment_cost.pdf"),
+        bbox_extra_artists=(lgd,),
+        bbox_inches="tight",
     )
+    investment_cost.T.divide(1e6).to_latex(
+        caption="Annualised investment cost per technology for all "
+        "scenarios in Mio. BBD.",
+        label="tab:investment_cost",
+        column_format="l" + "p{1.2cm}" * len(investment_cost.index),
+        float_format="{:0.2f}".format,
+        buf=_output("tables/investment_cost.tex"),
+    )
+
 
-    temp = pd.read_csv(
-        os.path.join(path, dir, "costs.csv"), index_col=0
+def agg_investment_cost(investment_cost):
+    (investment_cost.sum() / 1e6).to_latex(
+        caption="Aggregated investment cost in Mio. BBD per year.",
+        label="tab:agg_invest_cost",
+        float_format="{:0.2f}".format,
+        buf=_output("tables/agg_investment_cost.tex"),
     )
-    temp = temp.loc["Objective value"]
-    temp.name = dir
-    temp.index = ["Objective"]
-    objective = pd.concat([objective, temp], axis=1, sort=False)
 
-    temp = pd.read_csv(
-        os.path.join(path, dir, "BB-electricity.csv"), index_col=0
+
+def lcoe(LCOE):
+    co = [i for i in scenarios if "100" not in i]
+    re = [i for i in scenarios if "100" in i]
+
+    ldf = pd.DataFrame(columns=co)
+    ldf.loc["COPT"] = LCOE[co].values
+    ldf.loc["100RE"] = LCOE[re].values
+    ax = ldf.T.plot(kind="bar", cmap="Accent_r", rot=0)
+    ax.legend()
+    handles, labels = ax.get_legend_handles_labels()
+    lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
+    ax.set_ylabel("LCOE in BBD/kWh")
+    ax.grid(linestyle="--", lw=0.2)
+    lgd = ax.legend(
+        list(lgd.keys()),
+        list(lgd.values()),
+        loc="upper left",
+        ncol=1,
+        borderaxespad=0,
+        frameon=False,
     )
-    peak_demand[dir] = (
-        temp[[c for c in temp.columns if "load" in c]]
-        .sum(axis=1)
-        .max()
+    plt.savefig(
+        _output("figures/lcoe.pdf"),
+        bbox_extra_artists=(lgd,),
+        bbox_inches="tight",
+    )
+    ldf.T.to_latex(
+        caption="LCOE in BBD per kWh for all scenarios.",
+        label="tab:lcoe",
+        float_format="{:0.2f}".format,
+        buf=_output("tables/lcoe.tex"),
     )
 
-    temp["phs-cos"] = temp[phs_storages].clip(upper=0).sum(axis=1)
-    temp["phs"] = temp[phs_storages].clip(lower=0).sum(axis=1)
-    temp["battery-cos"] = temp["lithium-battery"].clip(upper=0)
-    temp["battery"] = temp["lithium-battery"].clip(lower=0)
-    temp["el-load"] = temp["el-load"] * -1
-    if "cruise-load-1" in temp.columns:
-        cruiseload  = "cruise-load-1"
-    elif "cruise-load" in temp.columns:
-        cruiseload  = "cruise-load"
-    else:
-        cruiseload = "cruise-load-2"
-    temp[cruiseload] = temp[cruiseload] * -1
-    temp["ev-load"] = temp["ev-load"] * -1
-    temp["el-excess"] = temp["el-excess"] * -1
-    temp = temp.sum()
-    temp.name = dir
-    temp = temp.drop(storages)
-    energy = pd.concat([energy, temp], axis=1, sort=False)
-
-    temp = pd.read_csv(
-        os.path.join(path, dir, "filling_levels.csv"), index_col=0,
+
+def dispatchable_capacity(peak_demand, dispatchable):
+    df = pd.concat(
+        [
+            pd.Series(peak_demand),
+            dispatchable.loc["dispatchable capacity"][scenarios],
+            dispatchable.loc["dispatchable share"][scenarios],
+        ],
+        axis=1,
+    )
+    df.columns = [
+        "Peak Demand in MW",
+        "Dispatchable Capacity in MW",
+        "Share in %",
+    ]
+    df = df.T[scenarios].T
+    df.to_latex(
+        caption="Peak demand and total dispatchable capacity in MW for all "
+        "scenarios.",
+        label="tab:energy",
+        float_format="{:0.2f}".format,
+        buf=_output("tables/total_dispatchable_capacity.tex"),
     )
-    temp = temp.max()
-    temp.name = dir
-    storage_capacity = pd.concat(
-        [storage_capacity, temp], axis=1, sort=False
+
+
+def energy(balance, re_share):
+    re_share = re_share.copy()
+    re_share.index = [c.replace("-base-", "-") for c in re_share.index]
+    select = [i for i in scenarios if "" in i]
+
+    e = balance.dropna()
+    e = e.rename(
+        index={
+            "el-load": "demand",
+            "cruise-load-1": "cruise-demand",
+            "cruise-load-2": "cruise-demand",
+            "ev-load": "ev-demand",
+            "el-excess": "excess",
+        }
+    )
+    e = e[scenarios].T
+
+    ax = e.divide(1e3).plot(
+        kind="bar",
+        stacked=True,
+        color=[color_dict.get(i.replace("-cos", "")) for i in e.columns],
+        label=[i if "-cos" not in i else None for i in e.columns],
+    )
+    ax.legend()
+    handles, labels = ax.get_legend_handles_labels()
+    lgd = {
+        k: v for k, v in dict(zip(handles, labels)).items() if "-cos" not in v
+    }
+    ax.set_ylabel("Energy in GWh")
+    ax.grid(linestyle="--", lw=0.5)
+    plt.xticks(rotation=90)
+
+    ax2 = ax.twinx()
+    re_share.reindex(select).multiply(100).plot(
+        linestyle="",
+        marker="o",
+        markersize=4,
+        color="darkred",
+        label="RE-share",
+        ax=ax2,
+    )
+    ax2.set_ylim(0, 100)
+    ax2.set_ylabel("RE share in %")
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    lgd = ax.legend(
+        list(lgd.keys()) + lines2,
+        list(lgd.values()) + labels2,
+        loc="lower left",
+        bbox_to_anchor=(-0.2, -0.55),
+        ncol=4,
+        borderaxespad=0,
+        frameon=False,
     )
 
-    capacities.set_index(
-        ["to", "carrier", "tech", "type"], append=True, inplace=True
+    plt.savefig(
+        _output("figures/energy.pdf"),
+        bbox_extra_artists=(lgd,),
+        bbox_inches="tight",
     )
-    capacities.columns = [dir]
-    all_capacities = pd.concat(
-        [all_capacities, capacities], axis=1, sort=False
+    e.divide(1e3).to_latex(
+        caption="Energy supply and demand in GWh.",
+        label="tab:energy",
+        float_format="{:0.2f}".format,
+        column_format="l" + "p{1.3cm}" * 15,
+        buf=_output("tables/energy.tex"),
     )
-    temp_p = pd.read_csv(
-        os.path.join(path, dir, "investment_power.csv"), index_col=0
+
+
+def dispatch_heatmap(heatmaps):
+    def frame(scenario, tech):
+        data = heatmaps.data[
+            heatmaps.scenarios.index(scenario), heatmaps.techs.index(tech)
+        ]
+        # hours of the day descending
+        return pd.DataFrame(
+            data[::-1],
+            index=range(heatmap.HOURS - 1, -1, -1),
+            columns=range(1, heatmap.DAYS + 1),
+        )
+
+    hydro_ = {s: frame(s, "hydro-phs") for s in [scenario1, scenario2]}
+    bio_ = {s: frame(s, "bagasse-st") for s in [scenario1, scenario2]}
+
+    def limits(data):
+        return {
+            "vmax": max(
+                data[scenario1].max().max(), data[scenario2].max().max()
+            ),
+            "vmin": min(
+                data[scenario1].min().min(), data[scenario2].min().min()
+            ),
+        }
+
+    fig, axs = plt.subplots(2, 2, sharex=True, sharey=True)
+    axs[0, 0] = sns.heatmap(
+        data=hydro_[scenario1],
+        xticklabels=False,
+        yticklabels=4,
+        cmap="bwr",
+        ax=axs[0, 0],
+        **limits(hydro_)
     )
-    temp_e = pd.read_csv(
-        os.path.join(path, dir, "investment_energy.csv"), index_col=0
+    axs[1, 0] = sns.heatmap(
+        data=bio_[scenario1],
+        xticklabels=40,
+        yticklabels=4,
+        cmap="summer",
+        ax=axs[1, 0],
+        **limits(bio_)
     )
-    temp = (temp_p.iloc[0] * temp_p.iloc[1]).to_frame()
-    temp.loc[temp_e.columns] = (
-        temp.loc[temp_e.columns]
-        + (temp_e.iloc[0] * temp_e.iloc[1]).to_frame()
+    axs[0, 1] = sns.heatmap(
+        data=hydro_[scenario2],
+        xticklabels=False,
+        yticklabels=4,
+        cmap="bwr",
+        ax=axs[0, 1],
+        cbar_kws={"label": "PHS in MWW"},
+        **limits(hydro_)
     )
-    temp.columns = [dir]
-    investment_cost = pd.concat(
-        [temp, investment_cost], axis=1, sort=False
+    axs[1, 1] = sns.heatmap(
+        data=bio_[scenario2],
+        xticklabels=40,
+        yticklabels=4,
+        cmap="summer",
+        ax=axs[1, 1],
+        cbar_kws={"label": "Bagasse in MW"},
+        **limits(bio_)
     )
 
-# wind = [i for i in investment_cost.index if "wind-onshore" in i]
-# investment_cost.loc["wind-onshore"] = investment_cost.loc[wind].sum()
-# investment_cost.drop(wind, inplace=True)
-ax = (
-    investment_cost[scenarios]
-    .T.divide(1e6)
-    .plot(
-        kind="bar",
-        stacked=True,
-        color=[
-            color_dict.get(i.replace("-cos", ""))
-            for i in investment_cost[scenarios].index
-        ],
+    axs[0, 0].set_ylabel("Hour of Day", fontsize=8)
+    axs[1, 0].set_ylabel("Hour of Day", fontsize=8)
+    axs[0, 1].set_ylabel("", fontsize=8)
+    axs[1, 1].set_ylabel("", fontsize=8)
+
+    axs[0, 0].set_title(scenario1)
+    axs[0, 1].set_title(scenario2)
+    axs[1, 0].set_xlabel("Day of Year")
+    axs[1, 1].set_xlabel("Day of Year")
+    axs[0, 1].set_xlabel("")
+    axs[0, 0].set_xlabel("")
+    axs[0, 0].set_xticklabels("")
+
+    plt.savefig(
+        _output("figures/heatmap-{}.pdf".format(scenario1)),
+        bbox_inches="tight",
     )
-)
-ax.legend()
-# ax.set_ylim(-60, 70)
-handles, labels = ax.get_legend_handles_labels()
-lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
-ax.set_ylabel("Investment cost in Mio. BBD")
-ax.grid(linestyle="--", lw=0.2)
-lgd = ax.legend(
-    list(lgd.keys()),
-    list(lgd.values()),
-    loc="lower left",
-    bbox_to_anchor=(-0.05, -0.55),
-    ncol=3,
-    borderaxespad=0,
-    frameon=False,
-)
-plt.savefig(
-    "visualization/figures/investment_cost.pdf",
-    bbox_extra_artists=(lgd,),
-    bbox_inches="tight",
-)
-investment_cost.T.divide(1e6).to_latex(
-    caption="Annualised investment cost per technology for all scenarios in Mio. BBD.",
-    label="tab:investment_cost",
-    column_format="lp{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}p{1.2cm}",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/investment_cost.tex",
-)
-
-# LCOE ----------------------------------------------------------------------
-LCOE = (
-    objective
-    / energy.loc[[c for c in energy.index if "load" in c]].sum()
-    / -1000
-)
-LCOE[scenarios].T.plot(kind="bar")
-
-co = [i for i in scenarios if not "100" in i]
-re = [i for i in scenarios if "100" in i]
-
-ldf = pd.DataFrame(columns=co)
-ldf.loc["COPT"] = LCOE[co].values[0]
-ldf.loc["100RE"] = LCOE[re].values[0]
-ax = ldf.T.plot(kind="bar", cmap="Accent_r", rot=0)
-ax.legend()
-# ax.set_ylim(-60, 70)
-handles, labels = ax.get_legend_handles_labels()
-lgd = {k: v for k, v in dict(zip(handles, labels)).items()}
-ax.set_ylabel("LCOE in BBD/kWh")
-ax.grid(linestyle="--", lw=0.2)
-lgd = ax.legend(
-    list(lgd.keys()),
-    list(lgd.values()),
-    loc="upper left",
-    # bbox_to_anchor=(-0.05, -0.4),
-    ncol=1,
-    borderaxespad=0,
-    frameon=False,
-)
-# plt.plot(figsize=(10, 5))
-plt.savefig(
-    "visualization/figures/lcoe.pdf",
-    bbox_extra_artists=(lgd,),
-    bbox_inches="tight",
-)
-ldf.T.to_latex(
-    caption="LCOE in BBD per kWh for all scenarios.",
-    label="tab:lcoe",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/lcoe.tex",
-)
-
-
-# dispatchable capacities  ---------------------------------------------------
-dispatchable_capacities = (
-    all_capacities[scenarios]
-    .T[
+
+
+Artifact = collections.namedtuple("Artifact", ["outputs", "inputs", "render"])
+Artifact.__doc__ = """Files written by `render`, called with the `inputs`"""
+
+ARTIFACTS = {
+    "re_share": Artifact(
+        ["tables/re_share.tex"], ["re_share"], re_share_table
+    ),
+    "installed_capacities": Artifact(
         [
-            "hfo-lsce",
-            "hfo-msce",
-            "bagasse-st",
-            "waste-ocgt",
-            "hydro-phs",
-            "lithium-battery",
-        ]
-    ]
-    .sum(axis=1)
-)
-dispatchable_capacities / pd.Series(peak_demand)
-df = pd.concat(
-    [
-        pd.Series(peak_demand),
-        dispatchable_capacities,
-        dispatchable_capacities / pd.Series(peak_demand),
-    ],
-    axis=1,
-)
-df.columns = [
-    "Peak Demand in MW",
-    "Dispatchable Capacity in MW",
-    "Share in %",
-]
-df = df.T[scenarios].T
-df.to_latex(
-    caption="Peak demand and total dispatchable capacity in MW for all scenarios.",
-    label="tab:energy",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/total_dispatchable_capacity.tex",
-)
-
-# energy plot ----------------------------------------------------------------
-
-e = energy.dropna()
-e.rename(
-    index={
-        "el-load": "demand",
-        "cruise-load-1": "cruise-demand",
-        "cruise-load-2": "cruise-demand",
-        "ev-load": "ev-demand",
-        "el-excess": "excess",
-    },
-    inplace=True,
-)
-
-e = e[scenarios].T
-
-ax = e.divide(1e3).plot(
-    kind="bar",
-    stacked=True,
-    color=[color_dict.get(i.replace("-cos", "")) for i in e.columns],
-    label=[i if not "-cos" in i else None for i in e.columns],
-)
-ax.legend()
-# ax.set_ylim(-60, 70)
-handles, labels = ax.get_legend_handles_labels()
-lgd = {
-    k: v
-    for k, v in dict(zip(handles, labels)).items()
-    if "-cos" not in v
+            "figures/installed_capacities.pdf",
+            "tables/installed_capacities.tex",
+        ],
+        ["capacities"],
+        installed_capacities,
+    ),
+    "investment_cost": Artifact(
+        ["figures/investment_cost.pdf", "tables/investment_cost.tex"],
+        ["investment_cost"],
+        investment_cost,
+    ),
+    "agg_investment_cost": Artifact(
+        ["tables/agg_investment_cost.tex"],
+        ["investment_cost"],
+        agg_investment_cost,
+    ),
+    "lcoe": Artifact(["figures/lcoe.pdf", "tables/lcoe.tex"], ["LCOE"], lcoe),
+    "dispatchable_capacity": Artifact(
+        ["tables/total_dispatchable_capacity.tex"],
+        ["peak_demand", "dispatchable"],
+        dispatchable_capacity,
+    ),
+    "energy": Artifact(
+        ["figures/energy.pdf", "tables/energy.tex"],
+        ["balance", "re_share"],
+        energy,
+    ),
+    "heatmap": Artifact(
+        ["figures/heatmap-{}.pdf".format(scenario1)],
+        ["heatmaps"],
+        dispatch_heatmap,
+    ),
 }
-ax.set_ylabel("Energy in GWh")
-ax.grid(linestyle="--", lw=0.5)
-plt.xticks(rotation=90)
-
-ax2 = ax.twinx()
-re_share.reindex(select).multiply(100).plot(
-    linestyle="",
-    marker="o",
-    markersize=4,
-    color="darkred",
-    label="RE-share",
-    ax=ax2,
-)
-ax2.set_ylim(0, 100)
-ax2.set_ylabel("RE share in %")
-lines2, labels2 = ax2.get_legend_handles_labels()
-# lgd = ax.legend(list(lgd.keys()) + lines2, list(lgd.values()) + labels2, ...)
-lgd = ax.legend(
-    list(lgd.keys()) + lines2,
-    list(lgd.values()) + labels2,
-    loc="lower left",
-    bbox_to_anchor=(-0.2, -0.55),
-    ncol=4,
-    borderaxespad=0,
-    frameon=False,
-)
-
-# plt.plot(figsize=(10, 5))
-plt.savefig(
-    "visualization/figures/energy.pdf",
-    bbox_extra_artists=(lgd,),
-    bbox_inches="tight",
-)
-e.divide(1e3).to_latex(
-    caption="Energy supply and demand in GWh.",
-    label="tab:energy",
-    float_format="{:0.2f}".format,
-    column_format="l"+ "p{1.3cm}" * 15,
-    buf="visualization/tables/energy.tex",
-)
-
-
-
-
-hydro_ = {}
-bio_ = {}
-for dir in os.listdir(path):
-    temp = pd.read_csv(
-        os.path.join(path, dir, "BB-electricity.csv"), index_col=0, parse_dates=True
+
+
+def inputs(path=path, names=None):
+    """Reads the data the artifacts are rendered from
+
+    The KPIs are only recomputed for changed runs (s. `kpi`), the hourly
+    results of the heatmap (s. `heatmap`) are only read if one of the
+    artifacts `names` needs them.
+    """
+    kpis, components = kpi.load(path)
+    data = {
+        "re_share": kpis.loc["RE share"].sort_index(),
+        "capacities": components["capacities"].sort_index(axis=1),
+        "investment_cost": components["investment_cost"],
+        "LCOE": kpis.loc["LCOE"],
+        "peak_demand": kpis.loc["peak demand"],
+        "dispatchable": kpis.loc[
+            ["dispatchable capacity", "dispatchable share"]
+        ],
+        "balance": components["balance"],
+    }
+    needed = set(i for n in names or ARTIFACTS for i in ARTIFACTS[n].inputs)
+    if "heatmaps" in needed:
+        data["heatmaps"] = heatmap.load(
+            path, [scenario1, scenario2], ["hydro-phs", "bagasse-st"]
+        )
+    return data
+
+
+def _hash(value, sha):
+    if isinstance(value, dict):
+        for key in sorted(value):
+            sha.update(str(key).encode())
+            _hash(value[key], sha)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        sha.update(pd.util.hash_pandas_object(value).values.tobytes())
+        if isinstance(value, pd.DataFrame):
+            sha.update(str(list(value.columns)).encode())
+        else:
+            sha.update(str(value.name).encode())
+    elif isinstance(value, np.ndarray):
+        sha.update(str(value.shape).encode())
+        sha.update(value.tobytes())
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _hash(item, sha)
+    else:
+        sha.update(repr(value).encode())
+
+
+def _names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def _code(function, sha, seen):
+    """Hashes the source of `function` and the globals of this module it
+    uses (e.g. `scenarios`, `color_dict`, `_output`), recursively
+    """
+    seen.add(function)
+    sha.update(inspect.getsource(function).encode())
+    for name in sorted(_names(function.__code__)):
+        if name not in globals():
+            continue
+        value = globals()[name]
+        if inspect.isfunction(value):
+            if value.__module__ == __name__ and value not in seen:
+                _code(value, sha, seen)
+        elif not (inspect.ismodule(value) or callable(value)):
+            sha.update(name.encode())
+            _hash(value, sha)
+
+
+def fingerprint(artifact, data):
+    """Fingerprint of the data and code of an artifact
+
+    The code is the render function with the functions and values of this
+    module it uses.
+    """
+    sha = hashlib.sha1()
+    sha.update(str(VERSION).encode())
+    _code(artifact.render, sha, set())
+    _hash({name: data[name] for name in artifact.inputs}, sha)
+    return sha.hexdigest()
+
+
+def _manifest_path():
+    return _output(".build.json")
+
+
+def _read_manifest():
+    try:
+        with open(_manifest_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    tmp = "{}.{}.tmp".format(_manifest_path(), os.getpid())
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, _manifest_path())
+
+
+def stale(names, data, manifest, force=False):
+    """Returns the fingerprints of the artifacts that have to be rendered"""
+    todo = {}
+    for name in names:
+        artifact = ARTIFACTS[name]
+        current = fingerprint(artifact, data)
+        missing = not all(os.path.exists(_output(o)) for o in artifact.outputs)
+        if force or missing or manifest.get(name) != current:
+            todo[name] = current
+    return todo
+
+
+def _render(name, data):
+    artifact = ARTIFACTS[name]
+    for output in artifact.outputs:
+        os.makedirs(os.path.dirname(_output(output)), exist_ok=True)
+    artifact.render(**{i: data[i] for i in artifact.inputs})
+    plt.close("all")
+
+
+def build(names=None, path=path, force=False, processes=None):
+    """Renders the stale artifacts `names` (default: all) in parallel
+
+    Returns the names of the rendered artifacts.
+    """
+    names = names or list(ARTIFACTS)
+    data = inputs(path, names)
+    manifest = _read_manifest()
+
+    todo = stale(names, data, manifest, force)
+    if not todo:
+        return []
+
+    rendered = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {
+            pool.submit(
+                _render,
+                name,
+                {i: data[i] for i in ARTIFACTS[name].inputs},
+            ): name
+            for name in todo
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                # keep the old fingerprint, the artifact is rendered again
+                print("Rendering {} failed: {}".format(name, e))
+                continue
+            manifest[name] = todo[name]
+            rendered.append(name)
+
+    _write_manifest(manifest)
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "artifacts",
+        nargs="*",
+        help="Any of {}, default: all.".format(", ".join(ARTIFACTS)),
+    )
+    parser.add_argument("--path", default=path)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render the artifacts even if they are up to date.",
     )
-    hydro = temp["hydro-phs"].to_frame()
-    hydro["day"] = hydro.index.dayofyear.values
-    hydro["hour"] = hydro.index.hour.values
-    hydro.set_index(["hour", "day"], inplace=True)
-    hydro = hydro.unstack("day")
-    hydro.columns = hydro.columns.droplevel(0)
-    hydro.sort_index(ascending=False, inplace=True)
-
-    biomass = temp["bagasse-st"].to_frame()
-    biomass["day"] = biomass.index.dayofyear.values
-    biomass["hour"] = biomass.index.hour.values
-    biomass.set_index(["hour", "day"], inplace=True)
-    biomass = biomass.unstack("day")
-    biomass.columns = biomass.columns.droplevel(0)
-    biomass.sort_index(ascending=False, inplace=True)
-
-    hydro_[dir] = hydro
-    bio_[dir] = biomass
-
-
-fig, axs = plt.subplots(2,2, sharex=True, sharey=True)
-scenario1= "REF"
-scenario2= "REF-100"
-#vmax = max(ex.max().max(), im.max().max())
-#vmin = min(ex.min().min(), im.min().min())
-axs[0,0] = sns.heatmap(
-    data=hydro_[scenario1].sort_index(ascending=False),
-    xticklabels=False,
-    yticklabels=4,
-    cmap="bwr",
-    vmax=max(hydro_[scenario1].max().max(),hydro_[scenario2].max().max()),
-    vmin=min(hydro_[scenario1].min().min(), hydro_[scenario2].min().min()),
-    ax=axs[0,0],
-    #cbar_kws={"label": "PHS in MWW"},
-)
-axs[1,0] = sns.heatmap(
-    data=bio_[scenario1].sort_index(ascending=False),
-    xticklabels=40,
-    yticklabels=4,
-    cmap="summer",
-    vmax=max(bio_[scenario1].max().max(),bio_[scenario2].max().max()),
-    vmin=min(bio_[scenario1].min().min(), bio_[scenario2].min().min()),
-    ax=axs[1,0],
-    #cbar_kws={"label": "Bagasse in MW"},
-)
-axs[0,1] = sns.heatmap(
-    data=hydro_[scenario2].sort_index(ascending=False),
-    xticklabels=False,
-    yticklabels=4,
-    cmap="bwr",
-    vmax=max(hydro_[scenario1].max().max(),hydro_[scenario2].max().max()),
-    vmin=min(hydro_[scenario1].min().min(), hydro_[scenario2].min().min()),
-    ax=axs[0,1],
-    cbar_kws={"label": "PHS in MWW"},
-)
-axs[1,1] = sns.heatmap(
-    data=bio_[scenario2].sort_index(ascending=False),
-    xticklabels=40,
-    yticklabels=4,
-    cmap="summer",
-    vmax=max(bio_[scenario1].max().max(),bio_[scenario2].max().max()),
-    vmin=min(bio_[scenario1].min().min(), bio_[scenario2].min().min()),
-    ax=axs[1,1],
-    cbar_kws={"label": "Bagasse in MW"},
-)
-
-#for a in axs:
-    #a.set_yticklabels(axs[1].get_yticklabels(), rotation=0, fontsize=8)
-    #a.set_xticklabels(axs[1].get_xticklabels(), rotation=0, fontsize=8)
-# axs[0,0].set_ylim(0, 24)
-# axs[1,0].set_ylim(0, 24)
-#
-# axs[1,0].set_xlim(0, 365)
-# axs[1,1].set_xlim(0, 365)
-
-axs[0,0].set_ylabel("Hour of Day", fontsize=8)
-axs[1,0].set_ylabel("Hour of Day", fontsize=8)
-axs[0,1].set_ylabel("", fontsize=8)
-axs[1,1].set_ylabel("", fontsize=8)
-
-axs[0,0].set_title(scenario1)
-axs[0,1].set_title(scenario2)
-axs[1,0].set_xlabel("Day of Year")
-axs[1,1].set_xlabel("Day of Year")
-axs[0, 1].set_xlabel("")
-axs[0, 0].set_xlabel("")
-axs[0, 0].set_xticklabels("")
-
-
-# plt.suptitle("Transmission Deviation for \n {0} vs. {1}".format(compare[0], compare[1]))
-plt.savefig(
-    "visualization/figures/heatmap-{}.pdf".format(scenario1),
-    # bbox_extra_artists=(lgd,),
-    bbox_inches="tight",
-)
-
-energy.loc["el-load"]["HD"] / (energy.loc["el-load"]["REF"])
-investment_cost.sum()/1e6 - investment_cost["REF-100"].sum()/1e6
-
-(investment_cost.sum()/1e6).to_latex(
-    caption="Aggregated investment cost in Mio. BBD per year.",
-    label="tab:agg_invest_cost",
-    float_format="{:0.2f}".format,
-    buf="visualization/tables/agg_investment_cost.tex",
-)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args()
+    unknown = set(args.artifacts) - set(ARTIFACTS)
+    if unknown:
+        parser.error("unknown artifacts: {}".format(", ".join(unknown)))
+
+    rendered = build(args.artifacts, args.path, args.force, args.processes)
+    print(
+        "Rendered {} of {} artifacts: {}".format(
+            len(rendered),
+            len(args.artifacts or ARTIFACTS),
+            ", ".join(sorted(rendered)) or "all up to date",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
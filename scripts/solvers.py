@@ -0,0 +1,369 @@
+"""
+Solver backends for the model pipeline.
+
+`file` is Pyomo's default interface: the model is written to an LP file,
+the solver is started as a separate process and its solution file is parsed
+back. The in-memory backends pass the model directly to the solver library
+without temporary files:
+
+* `persistent`: `<solver>_persistent`, e.g. `gurobi_persistent`
+* `appsi`: the APPSI interfaces of Pyomo >= 6.2, e.g. HiGHS via `highspy`,
+  not available with the Pyomo 5.7 of `requirements.txt`
+
+Both in-memory backends keep the model in the solver, so later solves
+(e.g. of a RE-share sweep) only pass the changes and start from the
+previous basis.
+
+`solve` returns the seconds spent for the export of the model to the solver,
+the solve itself and the loading of the solution back into the model. With
+the `file` backend export and loading can not be separated from each other
+and are reported together as `io`.
+
+Solver, backend, threads, LP algorithm, tolerance and time limit are set
+together by named profiles (`PROFILES`), e.g. `gurobi-barrier` for the
+barrier of Gurobi without crossover. `profile` returns the settings of a
+profile, `options` translates them into the options of the solver. HiGHS is
+only available with the `appsi` backend, i.e. with Pyomo >= 6.2 and `highspy`,
+which needs a newer oemof.solph than the one of `requirements.txt`.
+
+Duals are only loaded for the constraints declared with `receive_duals`,
+e.g. the bus balance of the electricity bus for its hourly prices. The
+in-memory backends take them from the dual vector of the solver, the `file`
+backend reads all duals of the solution file and keeps only these.
+"""
+
+import time
+
+import pyomo.environ as po
+from pyomo.opt import SolverFactory
+
+BACKENDS = ["file", "persistent", "appsi"]
+
+# name of the thread option for the different solvers
+THREAD_OPTIONS = {
+    "cbc": "threads",
+    "gurobi": "Threads",
+    "cplex": "threads",
+    "highs": "threads",
+}
+
+TIME_LIMIT_OPTIONS = {
+    "cbc": "sec",
+    "gurobi": "TimeLimit",
+    "cplex": "timelimit",
+    "highs": "time_limit",
+}
+
+# primal and dual feasibility (and barrier convergence) tolerances
+TOLERANCE_OPTIONS = {
+    "cbc": ["primalTolerance", "dualTolerance"],
+    "gurobi": ["FeasibilityTol", "OptimalityTol", "BarConvTol"],
+    "cplex": [
+        "simplex tolerances feasibility",
+        "simplex tolerances optimality",
+        "barrier convergetol",
+    ],
+    "highs": [
+        "primal_feasibility_tolerance",
+        "dual_feasibility_tolerance",
+        "ipm_optimality_tolerance",
+    ],
+}
+
+# options of the LP algorithms, "barrier" is used without crossover if the
+# crossover is switched off
+ALGORITHM_OPTIONS = {
+    "cbc": {
+        "barrier": {"barrier": ""},
+        "dual": {"dualSimplex": ""},
+        "no crossover": {"crossover": "off"},
+    },
+    "gurobi": {
+        "barrier": {"Method": 2},
+        "dual": {"Method": 1},
+        "no crossover": {"Crossover": 0},
+    },
+    "cplex": {
+        "barrier": {"lpmethod": 4},
+        "dual": {"lpmethod": 2},
+        "no crossover": {"barrier crossover": -1},
+    },
+    "highs": {
+        "barrier": {"solver": "ipm"},
+        "dual": {"solver": "simplex", "simplex_strategy": 1},
+        "no crossover": {"run_crossover": "off"},
+    },
+}
+
+# settings of a profile, None uses the default of the solver (or of the
+# caller for the backend)
+SETTINGS = {
+    "solver": None,
+    "backend": None,
+    "threads": None,
+    "algorithm": None,
+    "crossover": True,
+    "tolerance": None,
+    "time_limit": None,
+}
+
+PROFILES = {
+    # default solver with its own settings
+    "default": {},
+    "cbc": {"solver": "cbc"},
+    "cbc-barrier": {"solver": "cbc", "algorithm": "barrier"},
+    # HiGHS needs Pyomo >= 6.2, i.e. not the one of requirements.txt
+    "highs-ipm": {
+        "solver": "highs",
+        "backend": "appsi",
+        "algorithm": "barrier",
+        "crossover": False,
+    },
+    "highs-dual": {"solver": "highs", "backend": "appsi", "algorithm": "dual"},
+    "gurobi-barrier": {
+        "solver": "gurobi",
+        "algorithm": "barrier",
+        "crossover": False,
+    },
+    "gurobi-dual": {"solver": "gurobi", "algorithm": "dual"},
+}
+
+
+def default_solver():
+    # check if gurobi solver library is available
+    if SolverFactory("gurobi").available(exception_flag=False):
+        return "gurobi"
+    else:
+        return "cbc"
+
+
+def profile(name="default", **settings):
+    """Returns the settings of a profile
+
+    `settings` that are not None replace the ones of the profile, e.g.
+    `profile("gurobi-barrier", time_limit=600)`.
+    """
+    if name not in PROFILES:
+        raise ValueError("Unknown solver profile {}.".format(name))
+    result = dict(SETTINGS, **PROFILES[name])
+    result.update({k: v for k, v in settings.items() if v is not None})
+    result["solver"] = result["solver"] or default_solver()
+    return result
+
+
+def options(
+    solver,
+    threads=None,
+    algorithm=None,
+    crossover=True,
+    tolerance=None,
+    time_limit=None,
+    **settings
+):
+    """Translates the settings of a profile into the options of `solver`"""
+    result = {}
+    if threads is not None and solver in THREAD_OPTIONS:
+        result[THREAD_OPTIONS[solver]] = threads
+    if time_limit is not None and solver in TIME_LIMIT_OPTIONS:
+        result[TIME_LIMIT_OPTIONS[solver]] = time_limit
+    if tolerance is not None:
+        for option in TOLERANCE_OPTIONS.get(solver, []):
+            result[option] = tolerance
+    if algorithm is not None:
+        if algorithm not in ["barrier", "dual"]:
+            raise ValueError("Unknown algorithm {}.".format(algorithm))
+        if solver not in ALGORITHM_OPTIONS:
+            raise ValueError(
+                "Algorithm can not be set for solver {}.".format(solver)
+            )
+        result.update(ALGORITHM_OPTIONS[solver][algorithm])
+        if algorithm == "barrier" and not crossover:
+            result.update(ALGORITHM_OPTIONS[solver]["no crossover"])
+    return result
+
+
+def _appsi(solver):
+    # APPSI is only part of Pyomo >= 6.2
+    try:
+        from pyomo.contrib.appsi import solvers
+    except ImportError:
+        raise RuntimeError(
+            "The appsi backend requires Pyomo >= 6.2, s. README.md."
+        )
+
+    interfaces = {
+        "cbc": solvers.Cbc,
+        "cplex": solvers.Cplex,
+        "gurobi": solvers.Gurobi,
+        "highs": solvers.Highs,
+    }
+    if solver not in interfaces:
+        raise ValueError("No APPSI interface for solver {}.".format(solver))
+
+    return interfaces[solver]()
+
+
+def _options(opt, backend, solver):
+    if backend == "appsi":
+        return getattr(opt, solver + "_options")
+    return opt.options
+
+
+def interface(solver, backend, threads=None, options=None):
+    """Returns the in-memory interface of `solver`
+
+    `options` are passed to the solver, s. `options`. Raises a
+    `RuntimeError` if it is not available.
+    """
+    if backend == "persistent":
+        opt = SolverFactory(solver + "_persistent")
+        available = opt.available(exception_flag=False)
+    elif backend == "appsi":
+        opt = _appsi(solver)
+        available = bool(opt.available())
+    else:
+        raise ValueError("Unknown in-memory backend {}.".format(backend))
+
+    if not available:
+        raise RuntimeError(
+            "Solver {} is not available with backend {}.".format(
+                solver, backend
+            )
+        )
+
+    if threads is not None and solver in THREAD_OPTIONS:
+        _options(opt, backend, solver)[THREAD_OPTIONS[solver]] = threads
+    _options(opt, backend, solver).update(options or {})
+
+    return opt
+
+
+def available(solver, backend):
+    """Checks whether `solver` can be used with `backend`"""
+    if backend == "file":
+        return SolverFactory(solver).available(exception_flag=False)
+    try:
+        interface(solver, backend)
+    except Exception:
+        return False
+    return True
+
+
+def export(opt, m):
+    """Passes the model to an in-memory interface, returns the seconds"""
+    start = time.perf_counter()
+    opt.set_instance(m)
+    return time.perf_counter() - start
+
+
+def _solve_file(m, solver, threads, tee, options=None):
+    opt = SolverFactory(solver, solver_io="lp")
+    if threads is not None and solver in THREAD_OPTIONS:
+        opt.options[THREAD_OPTIONS[solver]] = threads
+    opt.options.update(options or {})
+
+    start = time.perf_counter()
+    results = opt.solve(m, tee=tee)
+    # the solution file holds the duals of all constraints
+    rows = getattr(m, "dual_rows", None)
+    if rows is not None and getattr(m, "dual", None) is not None:
+        duals = [(row, m.dual[row]) for row in rows if row in m.dual]
+        m.dual.clear()
+        m.dual.update(duals)
+    total = time.perf_counter() - start
+
+    # the solver reports its own run time, everything else is file I/O
+    seconds = getattr(results.solver, "wallclock_time", None)
+    if not isinstance(seconds, float):
+        seconds = getattr(results.solver, "time", None)
+    if not isinstance(seconds, float):
+        return {"io": None, "solve": total}
+
+    return {"io": total - seconds, "solve": seconds}
+
+
+def solve(
+    m,
+    solver=None,
+    backend="file",
+    threads=None,
+    tee=False,
+    opt=None,
+    options=None,
+):
+    """Solves `m` and loads the primal and dual values into the model
+
+    For the in-memory backends an interface created by `interface` can be
+    passed as `opt`, it is then expected to hold the model already (s.
+    `export`). `options` are passed to the solver, s. `options`. Returns
+    the interface (None for `file`) and the timings.
+    """
+    solver = solver or default_solver()
+
+    if backend == "file":
+        return None, _solve_file(m, solver, threads, tee, options)
+
+    timings = {}
+    if opt is None:
+        opt = interface(solver, backend, threads, options)
+        timings["export"] = export(opt, m)
+
+    # solph sets `dual` to None if the duals are not received
+    duals = getattr(m, "dual", None) is not None
+    # None loads the duals of all constraints
+    rows = getattr(m, "dual_rows", None)
+
+    if backend == "persistent":
+        start = time.perf_counter()
+        opt.solve(tee=tee, load_solutions=False, save_results=False)
+        timings["solve"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        opt.load_vars()
+        if duals:
+            opt.load_duals(cons_to_load=rows)
+        timings["load"] = time.perf_counter() - start
+    else:
+        opt.config.stream_solver = tee
+        opt.config.load_solution = False
+
+        start = time.perf_counter()
+        results = opt.solve(m)
+        timings["solve"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results.solution_loader.load_vars()
+        if duals:
+            m.dual.update(opt.get_duals(cons_to_load=rows))
+        timings["load"] = time.perf_counter() - start
+
+    return opt, timings
+
+
+def receive_duals(m, rows):
+    """Declares the constraint `rows` whose duals are loaded by `solve`
+
+    Replaces `Model.receive_duals`, which loads the duals of all
+    constraints and the reduced costs of all variables.
+    """
+    # solph sets `dual` to None
+    if hasattr(m, "dual"):
+        del m.dual
+    m.dual = po.Suffix(direction=po.Suffix.IMPORT)
+    m.dual_rows = list(rows)
+
+
+def update(opt, backend, constraint):
+    """Passes a constraint with changed mutable parameters to `opt`"""
+    if backend == "persistent":
+        opt.remove_constraint(constraint)
+        opt.add_constraint(constraint)
+    # APPSI updates the values of mutable parameters on its own
+
+
+def report(timings):
+    return ", ".join(
+        "{} {:.2f} s".format(stage, seconds)
+        for stage, seconds in timings.items()
+        if seconds is not None
+    )
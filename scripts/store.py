@@ -0,0 +1,210 @@
+"""
+Columnar store for the results of all runs.
+
+Instead of one directory of CSV files per run, the results of every run are
+written into one Parquet dataset per result table, partitioned by the key of
+the run (s. `naming.key`):
+
+    <results_path>/store/<table>/scenario=REF/carrier_scenario=base/
+        tech_scenario=reference/sensitivity=1.0/wacc=.../weather_year=.../
+        aggregation=.../part-0.parquet
+
+Tables are named like the CSV files of a run, i.e. `BB-electricity`,
+`filling_levels`, `capacities`, `investment_energy`, `investment_power`,
+`costs` etc. Timeseries are stored with a native `timeindex` column, values
+as float64. Runs without a value of a key (e.g. no sensitivity) are stored in
+the partition of its `MISSING` value and read as missing values.
+
+`read` loads any selection of columns and runs as one DataFrame with the key
+columns appended, e.g. the hourly excess of all 100% RE runs:
+
+    store.read("BB-electricity", ["timeindex", "el-excess"], sensitivity=1)
+
+Existing result directories are converted with
+
+    python scripts/store.py ~/oemof-results/barbados
+"""
+
+import glob
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import naming
+
+PARTITIONING = pa.schema(
+    [
+        ("scenario", pa.string()),
+        ("carrier_scenario", pa.string()),
+        ("tech_scenario", pa.string()),
+        ("sensitivity", pa.float64()),
+        ("wacc", pa.float64()),
+        ("weather_year", pa.int64()),
+        ("aggregation", pa.string()),
+    ]
+)
+
+store_path = os.path.join(
+    os.path.expanduser("~"), "oemof-results", "barbados", "store"
+)
+
+# partition values of missing keys, the hive partitioning of pyarrow 0.17 has
+# no null partitions
+MISSING = {
+    "scenario": "none",
+    "carrier_scenario": "none",
+    "tech_scenario": "none",
+    "sensitivity": -1.0,
+    "wacc": -1.0,
+    "weather_year": -1,
+    "aggregation": "none",
+}
+
+
+def _partition(key):
+    return os.path.join(
+        *[
+            "{}={}".format(
+                name, MISSING[name] if key[name] is None else key[name]
+            )
+            for name in PARTITIONING.names
+        ]
+    )
+
+
+def _table(path):
+    """Reads a CSV file of a run into the shape of its table"""
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    if name == "costs":
+        df = pd.read_csv(path, index_col=0).iloc[:, 0]
+        return df.rename_axis("name").rename("value").reset_index()
+
+    if name.startswith("investment_"):
+        df = pd.read_csv(path, index_col=0).T
+        return df.rename_axis("component").reset_index()
+
+    if name in ["capacities", "aggregation_error"]:
+        return pd.read_csv(path)
+
+    # timeseries, the excess flows have (from, to, type) columns
+    if name == "excess":
+        df = pd.read_csv(path, index_col=0, header=[0, 1, 2])
+        df.columns = [to for _, to, _ in df.columns]
+    else:
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df.index = pd.to_datetime(df.index)
+    df = df.astype("float64")
+    df.columns = [str(c) for c in df.columns]
+    return df.rename_axis("timeindex").reset_index()
+
+
+def write(df, table, key, root):
+    """Writes a frame of a run to the store, replaces existing data"""
+    directory = os.path.join(root, table, _partition(key))
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    path = os.path.join(directory, "part-0.parquet")
+    tmp = path + ".{}.tmp".format(os.getpid())
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+    os.replace(tmp, path)
+
+
+def ingest(scenario_path, key, root):
+    """Writes all CSV files of a run directory to the store"""
+    for path in sorted(glob.glob(os.path.join(scenario_path, "*.csv"))):
+        table = os.path.splitext(os.path.basename(path))[0]
+        df = _table(path)
+        if df.empty:
+            continue
+        write(df, table, key, root)
+
+
+def tables(root):
+    return sorted(
+        name
+        for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name))
+    )
+
+
+def _dataset(table, root):
+    path = os.path.join(root, table)
+    files = glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True)
+    if not files:
+        raise KeyError("No table {} in {}.".format(table, root))
+
+    # runs may have different components, i.e. columns
+    schema = pa.unify_schemas(
+        [pq.read_schema(f) for f in files] + [PARTITIONING]
+    )
+
+    return ds.dataset(
+        path,
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(PARTITIONING, flavor="hive"),
+    )
+
+
+def read(table, columns=None, root=store_path, **key):
+    """Reads a table for all runs matching `key`
+
+    `key` selects runs by the key columns, e.g. `scenario="REF"` or
+    `sensitivity=[None, 1]` (None selects the runs without a value). Only the
+    `columns` and the key columns are read.
+    """
+    dataset = _dataset(table, root)
+
+    condition = None
+    for name, values in key.items():
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        field = ds.field(name)
+        expression = None
+        for value in values:
+            e = field == (MISSING[name] if value is None else value)
+            expression = e if expression is None else expression | e
+        condition = expression if condition is None else condition & expression
+
+    if columns is not None:
+        columns = list(columns) + [
+            n for n in PARTITIONING.names if n not in columns
+        ]
+
+    df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    for name, value in MISSING.items():
+        df[name] = df[name].mask(df[name] == value)
+    return df
+
+
+def runs(root=store_path, table="costs"):
+    """Returns the keys of all runs in the store"""
+    df = read(table, columns=[], root=root)
+    return df[PARTITIONING.names].drop_duplicates().reset_index(drop=True)
+
+
+def convert(results_path, root=None):
+    """Writes all run directories below `results_path` to the store"""
+    root = root or os.path.join(results_path, "store")
+    for costs in glob.glob(
+        os.path.join(results_path, "**", "costs.csv"), recursive=True
+    ):
+        scenario_path = os.path.dirname(costs)
+        if os.path.abspath(scenario_path).startswith(os.path.abspath(root)):
+            continue
+        ingest(scenario_path, naming.read(scenario_path, results_path), root)
+        print("Stored {}.".format(scenario_path))
+
+    return root
+
+
+if __name__ == "__main__":
+    convert(*sys.argv[1:])
@@ -0,0 +1,140 @@
+"""
+Loader for sensitivity sweeps over any number of axes.
+
+All runs below a results directory are discovered from their `run.json` or
+the directory layout (s. `naming`), e.g. the base runs, `wacc/`, `wacc_low/`
+and `wacc-<wacc>/`. They are read concurrently in one pass. The columns of
+the returned frames are a `pd.MultiIndex` with one level per sensitivity
+axis, axes with only one value are dropped, e.g. for the wacc runs of the
+paper
+
+    scenario  sensitivity  wacc
+    REF       COPT         default
+    REF       100          10%
+
+The carrier and tech scenario are named in the scenario like the run
+directories, e.g. `LOP` for the paper combination and `REF-base-longterm` for
+other ones, s. `naming.scenario_name`.
+
+Missing values of an axis get a label: `COPT` for the CO2-limited base run
+without RE-share, `default` for the wacc of the technology data and the
+profiles of the scenario workbook and `full` for runs without aggregation.
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+import loader
+import naming
+
+LABELS = {
+    "sensitivity": "COPT",
+    "wacc": "default",
+    "weather_year": "default",
+    "aggregation": "full",
+}
+
+
+def _label(axis, value):
+    if value is None or value != value:
+        return LABELS.get(axis, "")
+    if axis == "sensitivity":
+        return "{:g}".format(value * 100)
+    if axis == "wacc":
+        return "{:g}%".format(value * 100)
+    if axis == "weather_year":
+        return str(int(value))
+    return value
+
+
+def discover(path):
+    """Returns the keys of all runs below `path` indexed by their directory"""
+    keys = {}
+    for costs in glob.glob(
+        os.path.join(path, "**", "costs.csv"), recursive=True
+    ):
+        scenario_path = os.path.dirname(costs)
+        if "dispatch" in os.path.relpath(scenario_path, path).split(os.sep):
+            # dispatch checks of runs, s. dispatch.py
+            continue
+        keys[scenario_path] = naming.read(scenario_path, path)
+
+    keys = pd.DataFrame.from_dict(keys, orient="index", columns=naming.KEYS)
+    for axis in keys.columns:
+        keys[axis] = [_label(axis, v) for v in keys[axis]]
+
+    return keys.sort_index()
+
+
+def load(path, workers=None, **select):
+    """Loads all runs below `path` as `loader.Results`
+
+    Runs can be selected by axis labels, e.g. `wacc=["default", "10%"]`,
+    also by `carrier_scenario` and `tech_scenario`.
+    """
+    keys = discover(path)
+    for axis, values in select.items():
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        keys = keys[keys[axis].isin(values)]
+
+    keys = keys.assign(
+        scenario=[
+            naming.scenario_name(s, c, t)
+            for s, c, t in zip(
+                keys["scenario"],
+                keys["carrier_scenario"],
+                keys["tech_scenario"],
+            )
+        ]
+    ).drop(columns=["carrier_scenario", "tech_scenario"])
+
+    axes = [a for a in keys.columns if keys[a].nunique() > 1]
+    if not axes:
+        axes = ["scenario"]
+
+    return loader.read(
+        list(keys.index),
+        pd.MultiIndex.from_frame(keys[axes].reset_index(drop=True)),
+        workers,
+    )
+
+
+def lcoe(results):
+    """LCOE in currency per kWh of all runs"""
+    balance = results.balance
+    demand = balance.loc[[c for c in balance.index if "load" in c]].sum()
+    return results.objective / demand / -1000
+
+
+def deviation(df, axis, reference):
+    """Deviation of all runs from the run with `reference` on `axis`
+
+    The reference runs are matched on all other axes, e.g. for
+    `deviation(capacities, "wacc", "default")` every wacc run is compared
+    with the run of the same scenario and RE-share with the default wacc.
+    """
+    frame = isinstance(df, pd.DataFrame)
+    if not frame:
+        df = df.to_frame().T
+
+    others = [n for n in df.columns.names if n != axis]
+    if not others:
+        result = df.drop(columns=reference).sub(df[reference], axis=0)
+        return result if frame else result.iloc[0]
+
+    stacked = df.stack(others)
+    result = stacked.drop(columns=reference).sub(stacked[reference], axis=0)
+    result = result.unstack(others).reorder_levels(df.columns.names, axis=1)
+
+    # only runs that exist, missing components count as zero
+    position = df.columns.names.index(axis)
+    result = result.reindex(
+        columns=[c for c in df.columns if c[position] != reference]
+    ).fillna(0)
+
+    if not frame:
+        return result.iloc[0].rename(None)
+    return result
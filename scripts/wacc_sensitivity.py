@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 from matplotlib import colors
 import seaborn as sns
 
+import sweeps
+
 
 color = {
     "hfo-msce": "lightgray",
@@ -62,94 +64,26 @@ scenarios += ["MRC"] + ["MRC-" + name for name in ["100"]]
 scenarios += ["HBC"] + ["HBC-" + name for name in ["100"]]
 
 bus = "BB-electricity"
-all_capacities = pd.DataFrame()
-all_capacities_wacc = pd.DataFrame()
-all_capacities_wacc_low = pd.DataFrame()
-
-for dir in os.listdir(path):
-    if "wacc" not in dir:
-        capacities = pd.read_csv(
-            os.path.join(path, dir, "capacities.csv"), index_col=0
-        )
-        capacities.set_index("to", append=True, inplace=True)
-        capacities = (
-            capacities.groupby(["to", "carrier", "tech"])
-            .sum()
-            .unstack("to")
-        )
-        capacities.index = ["-".join(i) for i in capacities.index]
-
-        temp = pd.read_csv(
-            os.path.join(path, dir, bus + ".csv"), index_col=0
-        )
-        temp = temp.sum()
-        temp.name = dir
-
-        capacities.columns = capacities.columns.droplevel(0)
-        capacities.columns = [dir]
-        all_capacities = pd.concat(
-            [all_capacities, capacities], axis=1, sort=False
-        )
-
-        #capacities.groupby(level=[0]).sum()
-for dir in os.listdir(path + "/wacc"):
-        capacities_wacc = pd.read_csv(
-            os.path.join(path, "wacc", dir, "capacities.csv"), index_col=0
-        )
-        capacities_wacc.set_index("to", append=True, inplace=True)
-        capacities_wacc = (
-            capacities_wacc.groupby(["to", "carrier", "tech"])
-            .sum()
-            .unstack("to")
-        )
-        capacities_wacc.index = ["-".join(i) for i in capacities_wacc.index]
-
-        temp = pd.read_csv(
-            os.path.join(path, dir, bus + ".csv"), index_col=0
-        )
-        temp = temp.sum()
-        temp.name = dir
-
-        capacities_wacc.columns = capacities_wacc.columns.droplevel(0)
-        capacities_wacc.columns = [dir]
-        all_capacities_wacc = pd.concat(
-            [all_capacities_wacc, capacities_wacc], axis=1, sort=False
-        )
 
-for dir in os.listdir(path + "/wacc_low"):
-        capacities_wacc_low = pd.read_csv(
-            os.path.join(path, "wacc_low", dir, "capacities.csv"), index_col=0
-        )
-        capacities_wacc_low.set_index("to", append=True, inplace=True)
-        capacities_wacc_low = (
-            capacities_wacc_low.groupby(["to", "carrier", "tech"])
-            .sum()
-            .unstack("to")
-        )
-        capacities_wacc_low.index = ["-".join(i) for i in capacities_wacc_low.index]
+# all runs of all wacc levels in one pass, s. scripts/sweeps.py, without the
+# runs of other weather years (s. scripts/model.py --weather-years)
+runs = sweeps.load(path, aggregation="full", weather_year="default")
 
-        temp = pd.read_csv(
-            os.path.join(path, dir, bus + ".csv"), index_col=0
-        )
-        temp = temp.sum()
-        temp.name = dir
 
-        capacities_wacc_low.columns = capacities_wacc_low.columns.droplevel(0)
-        capacities_wacc_low.columns = [dir]
-        all_capacities_wacc_low = pd.concat(
-            [all_capacities_wacc_low, capacities_wacc_low], axis=1, sort=False
-        )
-        #capacities.groupby(level=[0]).sum()
+def by_name(df, wacc):
+    """Selects one wacc level, columns are named like the run directories"""
+    df = df.xs(wacc, level="wacc", axis=1)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [
+            "-".join(str(i) for i in c if i != "COPT") for c in df.columns
+        ]
+    return df.sort_index(axis=1)
 
-all_capacities = all_capacities.sort_index(axis=1)
-all_capacities_wacc = all_capacities_wacc.sort_index(axis=1)
-all_capacities_wacc_low = all_capacities_wacc_low.sort_index(axis=1)
 
-deviation = all_capacities_wacc.sub(all_capacities)
-deviation_low = all_capacities_wacc_low.sub(all_capacities)
+deviations = sweeps.deviation(runs.capacities, "wacc", "default")
+deviation = by_name(deviations, "10%")
+deviation_low = by_name(deviations, "4%")
 
-deviation.fillna(0, inplace=True)
-deviation_low.fillna(0, inplace=True)
 
 vmax=pd.concat([deviation_low, deviation]).max().max()
 vmin=pd.concat([deviation_low, deviation]).min().min()
@@ -223,134 +157,18 @@ plt.savefig(
 
 
 
-energy = pd.DataFrame()
-objective = pd.DataFrame()
-
-for dir in os.listdir(path):
-    if "wacc" not in dir:
-        temp = pd.read_csv(
-            os.path.join(path, dir, "costs.csv"), index_col=0
-        )
-        temp = temp.loc["Objective value"]
-        temp.name = dir
-        temp.index = ["Objective"]
-        objective = pd.concat([objective, temp], axis=1, sort=False)
-
-        temp = pd.read_csv(
-            os.path.join(path, dir, "BB-electricity.csv"), index_col=0
-        )
-
-        temp["phs-cos"] = temp[phs_storages].clip(upper=0).sum(axis=1)
-        temp["phs"] = temp[phs_storages].clip(lower=0).sum(axis=1)
-        temp["battery-cos"] = temp["lithium-battery"].clip(upper=0)
-        temp["battery"] = temp["lithium-battery"].clip(lower=0)
-        temp["el-load"] = temp["el-load"] * -1
-        if "cruise-load-1" in temp.columns:
-            cruiseload  = "cruise-load-1"
-        elif "cruise-load" in temp.columns:
-            cruiseload  = "cruise-load"
-        else:
-            cruiseload = "cruise-load-2"
-        temp[cruiseload] = temp[cruiseload] * -1
-        temp["ev-load"] = temp["ev-load"] * -1
-        temp["el-excess"] = temp["el-excess"] * -1
-        temp = temp.sum()
-        temp.name = dir
-        temp = temp.drop(storages)
-        energy = pd.concat([energy, temp], axis=1, sort=False)
-
-
-energy_wacc = pd.DataFrame()
-objective_wacc = pd.DataFrame()
-for dir in os.listdir(path + "/wacc"):
-    temp = pd.read_csv(
-        os.path.join(path, "wacc", dir, "costs.csv"), index_col=0
-    )
-    temp = temp.loc["Objective value"]
-    temp.name = dir
-    temp.index = ["Objective"]
-    objective_wacc = pd.concat([objective_wacc, temp], axis=1, sort=False)
-
-    temp = pd.read_csv(
-        os.path.join(path, "wacc", dir, "BB-electricity.csv"), index_col=0
-    )
-
-    temp["phs-cos"] = temp[phs_storages].clip(upper=0).sum(axis=1)
-    temp["phs"] = temp[phs_storages].clip(lower=0).sum(axis=1)
-    temp["battery-cos"] = temp["lithium-battery"].clip(upper=0)
-    temp["battery"] = temp["lithium-battery"].clip(lower=0)
-    temp["el-load"] = temp["el-load"] * -1
-    if "cruise-load-1" in temp.columns:
-        cruiseload  = "cruise-load-1"
-    elif "cruise-load" in temp.columns:
-        cruiseload  = "cruise-load"
-    else:
-        cruiseload = "cruise-load-2"
-    temp[cruiseload] = temp[cruiseload] * -1
-    temp["ev-load"] = temp["ev-load"] * -1
-    temp["el-excess"] = temp["el-excess"] * -1
-    temp = temp.sum()
-    temp.name = dir
-    temp = temp.drop(storages)
-    energy_wacc = pd.concat([energy_wacc, temp], axis=1, sort=False)
-
-energy_wacc_low = pd.DataFrame()
-objective_wacc_low = pd.DataFrame()
-for dir in os.listdir(path + "/wacc_low"):
-    temp = pd.read_csv(
-        os.path.join(path, "wacc_low", dir, "costs.csv"), index_col=0
-    )
-    temp = temp.loc["Objective value"]
-    temp.name = dir
-    temp.index = ["Objective"]
-    objective_wacc_low = pd.concat([objective_wacc_low, temp], axis=1, sort=False)
-
-    temp = pd.read_csv(
-        os.path.join(path, "wacc_low", dir, "BB-electricity.csv"), index_col=0
-    )
-
-    temp["phs-cos"] = temp[phs_storages].clip(upper=0).sum(axis=1)
-    temp["phs"] = temp[phs_storages].clip(lower=0).sum(axis=1)
-    temp["battery-cos"] = temp["lithium-battery"].clip(upper=0)
-    temp["battery"] = temp["lithium-battery"].clip(lower=0)
-    temp["el-load"] = temp["el-load"] * -1
-    if "cruise-load-1" in temp.columns:
-        cruiseload  = "cruise-load-1"
-    elif "cruise-load" in temp.columns:
-        cruiseload  = "cruise-load"
-    else:
-        cruiseload = "cruise-load-2"
-    temp[cruiseload] = temp[cruiseload] * -1
-    temp["ev-load"] = temp["ev-load"] * -1
-    temp["el-excess"] = temp["el-excess"] * -1
-    temp = temp.sum()
-    temp.name = dir
-    temp = temp.drop(storages)
-    energy_wacc_low = pd.concat([energy_wacc_low, temp], axis=1, sort=False)
-
-
-
-LCOE = (
-    objective
-    / energy.loc[[c for c in energy.index if "load" in c]].sum()
-    / -1000
-)
-
-LCOE_wacc = (
-    objective_wacc
-    / energy_wacc.loc[[c for c in energy_wacc.index if "load" in c]].sum()
-    / -1000
-)
-
-LCOE_wacc_low = (
-    objective_wacc_low
-    / energy_wacc_low.loc[[c for c in energy_wacc_low.index if "load" in c]].sum()
-    / -1000
+LCOE = sweeps.lcoe(runs).to_frame().T
+# wacc levels in ascending order, the technology data uses 7%
+waccs = sorted(
+    runs.objective.index.unique("wacc"),
+    key=lambda w: 7 if w == "default" else float(w.rstrip("%")),
 )
 #LCOE_wacc.columns = [c + "-wacc" for c in LCOE_wacc]
 #ax = LCOE[scenarios].T.plot(kind="bar")
-LCOE_tab  = pd.concat([LCOE_wacc_low, LCOE, LCOE_wacc])
-LCOE_tab.index = ["WACC 4%", "WACC 7%", "WACC 10%"]
+LCOE_tab = pd.concat([by_name(LCOE, w) for w in waccs])
+LCOE_tab.index = [
+    "WACC {}".format("7%" if w == "default" else w) for w in waccs
+]
 ax = LCOE_tab.T.sort_index().plot(kind="bar")
 ax.set_ylabel("LCOE in BBD/kWh")
 ax.grid(linestyle="--", lw=0.2)
@@ -0,0 +1,246 @@
+"""
+Memory-mapped store of the wind and solar profiles of all weather years.
+
+The wind workbooks `data/wind_<year>.xlsx` have one sheet per zone with
+differently named sheets, header rows and columns; `data/solar.xlsx` has
+one column per year in its `all` sheet. `ingest` parses them once and
+writes one array per carrier (year x zone x 8760) as `.npy` file together
+with an `index.json` of the years and zones to `data/.weather`:
+
+    python scripts/weather.py
+
+Wind profiles are the electricity of the 2000 kW turbine divided by its
+capacity, solar has the single zone `trents`. `load` opens a store
+memory-mapped, so slicing a year or zone is a view without parsing or
+copying, e.g.
+
+    weather.profile("wind", 2006, "zone-4")
+
+The store is rebuilt on access if a workbook changed (s. `cache`).
+"""
+
+import collections
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+import cache
+
+datapath = os.path.join(os.getcwd(), "data")
+
+YEARS = [2002, 2006, 2010, 2014]
+PERIODS = 8760
+
+# rated power of the turbine in the wind workbooks in kW
+CAPACITY = 2000
+
+CARRIERS = ["wind", "solar"]
+
+# hours of the previous year at the start of the workbook data, these are in
+# Barbadian local time (UTC-4) starting at 20:00 of December 31
+OFFSETS = {"wind": {2006: 4}, "solar": {year: 4 for year in YEARS}}
+
+Weather = collections.namedtuple("Weather", ["years", "zones", "values"])
+Weather.__doc__ = """Profiles of a carrier, `values` is year x zone x hour"""
+
+
+def _directory(datapath):
+    return os.path.join(datapath, ".weather")
+
+
+def _workbooks(datapath):
+    return [
+        os.path.join(datapath, "wind_{}.xlsx".format(year)) for year in YEARS
+    ] + [os.path.join(datapath, "solar.xlsx")]
+
+
+def _zone(sheet_name):
+    """Zone of a sheet, e.g. `zone-4` for `Zone_4`, `wind_onshore_zone_4`"""
+    match = re.search(r"zone_?(\d+)$", sheet_name, re.IGNORECASE)
+    return None if match is None else "zone-{}".format(match.group(1))
+
+
+def _electricity(sheet):
+    """First `PERIODS` values below the `electricity` header of a sheet"""
+    for column in sheet.columns:
+        values = sheet[column]
+        header = values.astype(str).str.contains("electricity")
+        if header.any():
+            values = pd.to_numeric(
+                values[header.values.argmax() + 1 :], errors="coerce"
+            ).dropna()
+            if len(values) < PERIODS:
+                raise ValueError(
+                    "Only {} values in column {}.".format(len(values), column)
+                )
+            return values.values[:PERIODS]
+    raise ValueError("No electricity column.")
+
+
+def read_wind(path):
+    """Reads the normalized wind profiles of all zones of a workbook"""
+    profiles = {}
+    for name, sheet in pd.read_excel(path, None, header=None).items():
+        zone = _zone(name)
+        if zone is None:
+            continue
+        try:
+            profiles[zone] = _electricity(sheet) / CAPACITY
+        except ValueError as e:
+            raise ValueError("{} sheet {}: {}".format(path, name, e))
+    return pd.DataFrame(profiles)[sorted(profiles, key=lambda z: int(z[5:]))]
+
+
+def read_solar(path):
+    """Reads the solar profiles of all years, one column per year"""
+    df = pd.read_excel(path, sheet_name="all")
+    return pd.DataFrame(
+        {
+            year: df["BB_solar_trents_{}".format(year)].values[:PERIODS]
+            for year in YEARS
+        }
+    )
+
+
+def _write(path, array):
+    tmp = "{}.{}.tmp.npy".format(path[:-4], os.getpid())
+    out = np.lib.format.open_memmap(
+        tmp, mode="w+", dtype="float64", shape=array.shape
+    )
+    out[:] = array
+    out.flush()
+    del out
+    os.replace(tmp, path)
+
+
+def ingest(datapath=datapath):
+    """Parses all weather workbooks and writes the store"""
+    directory = _directory(datapath)
+    os.makedirs(directory, exist_ok=True)
+
+    wind = [
+        read_wind(os.path.join(datapath, "wind_{}.xlsx".format(year)))
+        for year in YEARS
+    ]
+    zones = list(wind[0].columns)
+    for year, df in zip(YEARS, wind):
+        if list(df.columns) != zones:
+            raise ValueError(
+                "Zones of {} differ: {}".format(year, list(df.columns))
+            )
+    solar = read_solar(os.path.join(datapath, "solar.xlsx"))
+
+    _write(
+        os.path.join(directory, "wind.npy"),
+        np.stack([df.values.T for df in wind]),
+    )
+    _write(
+        os.path.join(directory, "solar.npy"),
+        solar.values.T[:, np.newaxis, :],
+    )
+
+    index = {
+        "years": YEARS,
+        "zones": {"wind": zones, "solar": ["trents"]},
+        "periods": PERIODS,
+        "workbooks": {
+            os.path.basename(p): cache._stat(p) for p in _workbooks(datapath)
+        },
+    }
+
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(index, f, indent=2)
+
+    cache._replace(os.path.join(directory, "index.json"), write)
+
+    return index
+
+
+def _index(datapath):
+    try:
+        with open(os.path.join(_directory(datapath), "index.json")) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    workbooks = {
+        os.path.basename(p): cache._stat(p) for p in _workbooks(datapath)
+    }
+    if index["workbooks"] != workbooks:
+        return None
+    return index
+
+
+# stores already opened by this process
+_stores = {}
+
+
+def load(carrier, datapath=datapath):
+    """Opens the profiles of `carrier` (s. `CARRIERS`) memory-mapped
+
+    Ingests the workbooks first if the store is missing or outdated.
+    """
+    index = _index(datapath) or ingest(datapath)
+
+    key = (os.path.abspath(datapath), carrier, json.dumps(index["workbooks"]))
+    if key not in _stores:
+        _stores[key] = Weather(
+            years=index["years"],
+            zones=index["zones"][carrier],
+            values=np.load(
+                os.path.join(_directory(datapath), carrier + ".npy"),
+                mmap_mode="r",
+            ),
+        )
+    return _stores[key]
+
+
+def profile(carrier, year, zone=None, datapath=datapath):
+    """Profile of a year and zone (default: first zone) as view"""
+    weather = load(carrier, datapath)
+    zone = weather.zones[0] if zone is None else zone
+    return weather.values[weather.years.index(year), weather.zones.index(zone)]
+
+
+def scenario_profile(carrier, year, zone=None, datapath=datapath):
+    """Profile of a year and zone like in the scenario workbooks
+
+    The hours of the previous year are dropped and the missing hours at the
+    end of the year are filled with the last value, s. README.
+    """
+    values = profile(carrier, year, zone, datapath)
+    offset = OFFSETS[carrier].get(year, 0)
+    return np.concatenate([values[offset:], np.repeat(values[-1], offset)])
+
+
+def frame(carrier, years=None, zones=None, start="2014", datapath=datapath):
+    """Profiles as frame with (year, zone) columns and hourly index
+
+    All years are indexed with the hours of `start`, e.g. to compare them
+    after resampling.
+    """
+    weather = load(carrier, datapath)
+    return pd.DataFrame(
+        {
+            (year, zone): profile(carrier, year, zone, datapath)
+            for year in years or weather.years
+            for zone in zones or weather.zones
+        },
+        index=pd.date_range(start, periods=PERIODS, freq="H"),
+    )
+
+
+if __name__ == "__main__":
+    index = ingest(*sys.argv[1:])
+    print(
+        "Stored {} weather years of {} wind zones in {}.".format(
+            len(index["years"]),
+            len(index["zones"]["wind"]),
+            _directory(*sys.argv[1:] or [datapath]),
+        )
+    )
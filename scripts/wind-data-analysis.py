@@ -4,8 +4,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-solar = pd.read_excel("data/solar.xlsx", sheet_name="all")
-solar.index = pd.date_range("2014", freq="h", periods=8760)
+import weather
+
+# all weather years are read from the memory-mapped store, s. weather.py
+solar = weather.frame("solar")
+solar.columns = ["BB_solar_trents_{}".format(y) for y, _ in solar.columns]
 solar.resample("D").mean().plot()
 solar["Day of Year"] = solar.index.dayofyear
 solar.set_index("Day of Year",append=True, inplace=True)
@@ -19,23 +22,12 @@ solar_plot.rename(columns={0: "Capacity Factor"} ,inplace=True)
 #     bbox_inches="tight",
 # )
 
-df = pd.read_excel("data/wind_2014.xlsx", sheet_name="zone_1")
-data14 = df["BB_wind_onshore_profile_zone_1"].to_frame()
-
-df2 = pd.read_excel("data/wind_2002.xlsx", sheet_name="zone_1")
-data02 = df2["BB_wind_onshore_profile_zone_1"].to_frame()
-
-df3 = pd.read_excel("data/wind_2006.xlsx", sheet_name="zone_1", skiprows=[0,1,2])
-data06 = df3["BB_wind_onshore_profile_zone_1"].to_frame()
-
-df4 = pd.read_excel("data/wind_2010.xlsx", sheet_name="zone_1")
-data10 = df4["BB_wind_onshore_profile_zone_1"].to_frame()
-
 # 2014 for all years to allow concat after resample
-data14.index = pd.date_range("2014", freq="h", periods=8760)
-data02.index = pd.date_range("2014", freq="h", periods=8760)
-data10.index = pd.date_range("2014", freq="h", periods=8760)
-data06.index = pd.date_range("2014", freq="h", periods=8760)
+wind = weather.frame("wind", zones=["zone-1"], start="2014")
+wind.columns = ["BB_wind_onshore_profile_zone_1"] * len(wind.columns)
+data14, data06, data02, data10 = [
+    wind.iloc[:, [weather.YEARS.index(y)]] for y in [2014, 2006, 2002, 2010]
+]
 
 means = pd.concat([
  data14.resample("D").mean(),
@@ -69,7 +61,7 @@ plt.savefig(
     bbox_inches="tight",
 )
 # heat map plot ....
-data14.index = pd.date_range("2014", freq="h", periods=8760)
+data14 = data14.copy()
 data14["hour"] = data14.index.hour
 data14["day"] = data14.index.dayofyear
 data14.set_index(["hour", "day"], inplace=True)
@@ -0,0 +1,303 @@
+"""
+Streaming writer of the results of a solved model.
+
+`pp.write_results` works on `processing.results`, which turns every variable
+of the model into pandas objects while the model is still in memory.
+`extract` instead reads only the values that are written (flows, storage
+contents, investments, duals of the bus balances and the costs) from the
+Pyomo variables into numpy arrays, the model can be released afterwards:
+
+    solution = writer.extract(m)
+    del m
+    writer.write(es, solution, scenario_path, co2=True)
+
+`write` then writes the files of `pp.write_results` bus by bus in the same
+format, together with the investment cost and `costs.csv`. Every file is
+written once. Instead of the shadow prices of all buses, the hourly prices
+of the buses whose duals were received (s. `solvers.receive_duals`) are
+written to `prices.csv`.
+"""
+
+import collections
+import os
+
+import numpy as np
+import pandas as pd
+
+import oemof.tabular.facades as fc
+from oemof.solph import Bus
+from oemof.solph.components import GenericStorage
+from oemof.network.network import Sink
+
+# facade types in the order of the columns of the bus files
+SUPPLY = [
+    "dispatchable",
+    "volatile",
+    "conversion",
+    "backpressure",
+    "heatpump",
+    "extraction",
+    "storage",
+    "reservoir",
+]
+DEMAND = ["load", "conversion", "heatpump"]
+
+STORAGE_BLOCKS = ["GenericStorageBlock", "GenericInvestmentStorageBlock"]
+
+Solution = collections.namedtuple(
+    "Solution", ["flows", "invest", "content", "duals", "costs"]
+)
+Solution.__doc__ = """Values of a solved model, s. `extract`
+
+flows: flow values per (input, output)
+invest: invested capacity per (input, output) and (storage, None) for the
+    storage energy
+content: storage content per storage
+duals: duals of the received bus balances per bus divided by the objective
+    weighting, None without duals
+costs: objective value and, with a CO2 limit, the emissions (Mio. t) and
+    their shadow price
+"""
+
+
+def _values(var, index, timesteps):
+    return np.array([var[i + (t,)].value for i in index for t in timesteps])
+
+
+def extract(m):
+    """Reads the values written by `write` from the solved model"""
+    timesteps = list(m.TIMESTEPS)
+    n = len(timesteps)
+
+    flows = list(m.FLOWS)
+    values = _values(m.flow, flows, timesteps).reshape(-1, n)
+    flows = dict(zip(flows, values.astype(float)))
+
+    invest = {}
+    if hasattr(m, "InvestmentFlow"):
+        invest.update((k, v.value) for k, v in m.InvestmentFlow.invest.items())
+    if hasattr(m, "GenericInvestmentStorageBlock"):
+        invest.update(
+            ((k, None), v.value)
+            for k, v in m.GenericInvestmentStorageBlock.invest.items()
+        )
+
+    content = {}
+    for name in STORAGE_BLOCKS:
+        block = getattr(m, name, None)
+        if block is None:
+            continue
+        storages = sorted(set(s for s, _ in block.storage_content))
+        values = _values(
+            block.storage_content, [(s,) for s in storages], timesteps
+        ).reshape(-1, n)
+        content.update(zip(storages, values.astype(float)))
+
+    duals = None
+    if getattr(m, "dual", None) is not None:
+        weighting = np.array([m.objective_weighting[t] for t in timesteps])
+        buses = sorted(set(b for b, _ in m.Bus.balance))
+        duals = {
+            b: np.array([m.dual[m.Bus.balance[b, t]] for t in timesteps])
+            / weighting
+            for b in buses
+            if m.Bus.balance[b, timesteps[0]] in m.dual
+        }
+
+    costs = {"Objective value": m.objective()}
+    if hasattr(m, "integral_limit_emission_factor_constraint"):
+        constraint = m.integral_limit_emission_factor_constraint
+        costs["CO2 (Mio. t)"] = constraint() / 1e6
+        if duals is not None and constraint in m.dual:
+            costs["Shadow Price in $/t"] = m.dual[constraint]
+
+    return Solution(flows, invest, content, duals, costs)
+
+
+def _key(flow):
+    # nodes are ordered by label, s. `views.convert_to_multiindex`
+    return tuple(str(n) for n in flow)
+
+
+def _typemap(es):
+    return getattr(es, "typemap", fc.TYPEMAP)
+
+
+def bus_balance(es, solution, bus):
+    """Supply, net import, demand and excess of `bus`, s. `pp.write_results`
+
+    Storages are included as net output, the net import via links is
+    returned separately (None without links).
+    """
+    typemap = _typemap(es)
+    flows = sorted(solution.flows, key=_key)
+
+    columns = collections.OrderedDict()
+    for typ in SUPPLY:
+        cls = typemap[typ]
+        if issubclass(cls, GenericStorage) and cls is not fc.Reservoir:
+            for n in sorted(
+                (n for n in solution.content if isinstance(n, cls)), key=str
+            ):
+                if bus in n.outputs:
+                    columns[n] = sum(
+                        solution.flows[i, o] for i, o in flows if i is n
+                    ) - sum(solution.flows[i, o] for i, o in flows if o is n)
+        else:
+            for i, o in flows:
+                if isinstance(i, cls) and o is bus:
+                    columns[i] = solution.flows[i, o]
+
+    net_import = None
+    links = [(i, o) for i, o in flows if isinstance(o, typemap["link"])]
+    if any(i is bus for i, _ in links):
+        net_import = sum(
+            solution.flows[i, o]
+            for i, o in flows
+            if isinstance(i, typemap["link"]) and o is bus
+        ) - sum(solution.flows[i, o] for i, o in links if i is bus)
+        columns["import"] = net_import
+
+    for typ in DEMAND + ["excess"]:
+        for i, o in flows:
+            if i is bus and isinstance(o, typemap[typ]):
+                columns[o] = solution.flows[i, o]
+
+    df = pd.DataFrame(
+        {str(k): v for k, v in columns.items()}, index=es.timeindex
+    )
+    return df, net_import
+
+
+def capacities(es, solution):
+    """Invested and existing capacities, s. `pp.write_results`"""
+    rows = []
+    for bus in [n for n in es.nodes if isinstance(n, Bus)]:
+        for i, o in sorted(solution.invest, key=_key):
+            if (bus is i or bus is o) and solution.invest[i, o] is not None:
+                rows.append(
+                    (
+                        i,
+                        o,
+                        "invest",
+                        getattr(i, "tech", np.nan),
+                        getattr(i, "carrier", np.nan),
+                        solution.invest[i, o],
+                    )
+                )
+
+    for n in es.nodes:
+        if isinstance(n, (Bus, Sink, fc.Shortage, _typemap(es)["link"])):
+            continue
+        if getattr(n, "capacity", None) is not None:
+            rows.append(
+                (
+                    n,
+                    list(n.outputs)[0],
+                    "capacity",
+                    n.tech,
+                    n.carrier,
+                    n.capacity,
+                )
+            )
+
+    df = pd.DataFrame(
+        [tuple(map(str, r[:3])) + r[3:] for r in rows],
+        columns=["from", "to", "type", "tech", "carrier", "value"],
+    )
+    return df.set_index(["from", "to", "type", "tech", "carrier"])
+
+
+def investment_cost(es, solution):
+    """Annualised cost and invested energy and power per component"""
+    bus = es.groups["BB-electricity"]
+    invest_e = {}
+    invest_p = {}
+    for n in es.nodes:
+        if hasattr(n, "storage_capacity_cost"):
+            if n.storage_capacity_cost is not None:
+                invest_e[n.label] = (
+                    n.storage_capacity_cost,
+                    solution.invest[n, None],
+                )
+                invest_p[n.label] = (n.capacity_cost, solution.invest[bus, n])
+        elif hasattr(n, "capacity_cost"):
+            if n.capacity_cost is not None:
+                invest_p[n.label] = (n.capacity_cost, solution.invest[n, bus])
+
+    return (
+        pd.DataFrame(invest_e, index=["$/MWha", "MWh"]),
+        pd.DataFrame(invest_p, index=["$/MWa", "MW"]),
+    )
+
+
+def write(es, solution, scenario_path, co2=False):
+    """Writes the results of a run, s. `pp.write_results`"""
+    os.makedirs(scenario_path, exist_ok=True)
+
+    def save(df, name):
+        df.to_csv(os.path.join(scenario_path, name + ".csv"))
+
+    typemap = _typemap(es)
+    buses = [n for n in es.nodes if isinstance(n, Bus)]
+
+    imports = pd.DataFrame()
+    for bus in buses:
+        df, net_import = bus_balance(es, solution, bus)
+        save(df, bus.label)
+        if net_import is not None:
+            imports[bus.label] = net_import
+    if not imports.empty:
+        imports.index = es.timeindex
+    save(imports, "import")
+
+    excess = sorted(
+        (k for k in solution.flows if isinstance(k[1], typemap["excess"])),
+        key=_key,
+    )
+    if excess:
+        df = pd.DataFrame(
+            np.array([solution.flows[k] for k in excess]).T,
+            index=es.timeindex,
+            columns=pd.MultiIndex.from_tuples(
+                [(str(i), str(o), "flow") for i, o in excess],
+                names=["from", "to", "type"],
+            ),
+        )
+        save(df, "excess")
+
+    save(capacities(es, solution), "capacities")
+
+    if solution.duals:
+        save(
+            pd.DataFrame(
+                {
+                    b.label: solution.duals[b]
+                    for b in buses
+                    if b in solution.duals
+                },
+                index=es.timeindex,
+            ),
+            "prices",
+        )
+
+    if solution.content:
+        save(
+            pd.DataFrame(
+                {
+                    n.label: solution.content[n]
+                    for n in sorted(solution.content, key=str)
+                },
+                index=es.timeindex,
+            ),
+            "filling_levels",
+        )
+
+    energy, power = investment_cost(es, solution)
+    save(energy, "investment_energy")
+    save(power, "investment_power")
+
+    names = ["Objective value"]
+    if co2:
+        names = ["CO2 (Mio. t)", "Shadow Price in $/t", "Objective value"]
+    save(pd.Series([solution.costs[n] for n in names], index=names), "costs")